@@ -3,18 +3,58 @@
 from __future__ import annotations
 
 import logging
+from datetime import timedelta
+from pathlib import Path
 from typing import TYPE_CHECKING
 
-from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
+from homeassistant.const import (
+    CONF_PASSWORD,
+    CONF_UNIT_OF_MEASUREMENT,
+    CONF_USERNAME,
+    Platform,
+)
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
-
-from .api import MedtrumEasyViewApiClient
-from .const import BASE_URL_LIST, COUNTRY, DOMAIN
+    from homeassistant.helpers.typing import ConfigType
+
+from .api import (
+    MedtrumEasyViewApiAuthenticationError,
+    MedtrumEasyViewApiClient,
+    MedtrumEasyViewApiError,
+)
+from .const import (
+    BASE_URL_LIST,
+    CONF_LOOP_BUDGET_MS,
+    CONF_OFFLOAD_THRESHOLD_KB,
+    CONF_SNAPSHOT_FILE,
+    CONF_UID,
+    CONF_WINDOW,
+    COUNTRY,
+    DEFAULT_LOOP_BUDGET_MS,
+    DEFAULT_OFFLOAD_THRESHOLD_KB,
+    DEFAULT_WINDOW,
+    DOMAIN,
+    HISTORY_COMPACT_INTERVAL_HOURS,
+    HISTORY_FILE_SUFFIX,
+    MG_DL,
+    ROLLUP_STATISTICS_INTERVAL_MIN,
+    WindowMode,
+)
 from .coordinator import MedtrumEasyViewDataUpdateCoordinator
+from .history import ReadingLog
+from .loop_monitor import LoopLagMonitor
+from .poller import SnapshotFileSource
+from .pump_states import PumpStateTracker
+from .services import async_setup_services
+from .websocket_api import async_setup_websocket_api
 
 PLATFORMS: list[Platform] = [
     Platform.SENSOR,
@@ -24,6 +64,15 @@ PLATFORMS: list[Platform] = [
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001
+    """Set up the integration services and websocket API."""
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
@@ -36,6 +85,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
     hass.data.setdefault(DOMAIN, {})
 
+    # Measure how long polling blocks the event loop, large payloads are
+    # decoded in the executor.
+    monitor = LoopLagMonitor(
+        budget=entry.options.get(CONF_LOOP_BUDGET_MS, DEFAULT_LOOP_BUDGET_MS) / 1000,
+        offload_threshold=int(
+            entry.options.get(CONF_OFFLOAD_THRESHOLD_KB, DEFAULT_OFFLOAD_THRESHOLD_KB)
+            * 1024
+        ),
+    )
+    monitor.start()
+    entry.async_on_unload(monitor.stop)
+
     #    Using the declared API for login based on patient credentials.
 
     my_medtrum_easyview = MedtrumEasyViewApiClient(
@@ -43,21 +104,79 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         password=entry.data[CONF_PASSWORD],
         base_url=BASE_URL_LIST.get(entry.data[COUNTRY]) or BASE_URL_LIST["Global"],
         session=async_get_clientsession(hass),
+        monitor=monitor,
+        window=WindowMode(entry.options.get(CONF_WINDOW, DEFAULT_WINDOW)),
+        time_zone=dt_util.get_default_time_zone(),
     )
 
-    # Validate credentials
-    await my_medtrum_easyview.async_login()
+    # Validate credentials, setup is retried while the cloud is unreachable.
+    try:
+        await my_medtrum_easyview.async_login()
+    except MedtrumEasyViewApiAuthenticationError as exception:
+        raise ConfigEntryAuthFailed(exception) from exception
+    except MedtrumEasyViewApiError as exception:
+        raise ConfigEntryNotReady(exception) from exception
+
+    # The uid names the local data files, keep it to delete them with the entry.
+    if entry.data.get(CONF_UID) != my_medtrum_easyview.uid:
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_UID: my_medtrum_easyview.uid}
+        )
+
+    # Local reading log of the patient, kept across restarts.
+    reading_log = _reading_log(hass, my_medtrum_easyview.uid)
+    await hass.async_add_executor_job(reading_log.open)
+    entry.async_on_unload(reading_log.close)
+
+    # Snapshots of the headless poller, used instead of polling the API.
+    source = None
+    if snapshot_file := entry.options.get(CONF_SNAPSHOT_FILE):
+        source = SnapshotFileSource(
+            Path(hass.config.path(snapshot_file)), my_medtrum_easyview.uid
+        )
 
     hass.data[DOMAIN][entry.entry_id] = coordinator = (
         MedtrumEasyViewDataUpdateCoordinator(
             hass=hass,
             client=my_medtrum_easyview,
+            reading_log=reading_log,
+            unit_of_measurement=entry.data.get(CONF_UNIT_OF_MEASUREMENT, MG_DL),
+            monitor=monitor,
+            source=source,
         )
     )
+    await coordinator.async_load_rollups()
+    await coordinator.pump_states.async_load()
 
     # First poll of the data to be ready for entities initialization
     await coordinator.async_config_entry_first_refresh()
 
+    # Fetch what was missed while Home Assistant was not running, the
+    # integration does not query the cloud when the poller feeds it.
+    if source is None:
+        entry.async_create_background_task(
+            hass, coordinator.async_backfill_history(), "medtrum_easyview_backfill"
+        )
+
+    # Apply the retention setting now and then once a day.
+    await coordinator.async_compact_history()
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            coordinator.async_compact_history,
+            timedelta(hours=HISTORY_COMPACT_INTERVAL_HOURS),
+        )
+    )
+
+    # Keep the hourly statistics of the rollups up to date.
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            coordinator.async_import_statistics,
+            timedelta(minutes=ROLLUP_STATISTICS_INTERVAL_MIN),
+        )
+    )
+
     # Then launch async_setup_entry for our entities in sensor.py and binary_sensor.py
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -70,11 +189,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
     if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.pump_states.async_save()
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the local data of the patient when its entry is removed."""
+    if (uid := entry.data.get(CONF_UID)) is None:
+        return
+    if any(
+        other.data.get(CONF_UID) == uid
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id
+    ):
+        # Another entry follows the same patient and still uses the files.
+        return
+    await hass.async_add_executor_job(_reading_log(hass, uid).delete)
+    await PumpStateTracker(hass, uid).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry  when it changed."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+def _reading_log(hass: HomeAssistant, uid: str) -> ReadingLog:
+    """Return the local reading log of a patient, not opened yet."""
+    return ReadingLog(
+        Path(hass.config.path(STORAGE_DIR, DOMAIN, uid + HISTORY_FILE_SUFFIX))
+    )
@@ -4,11 +4,16 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import hashlib
 import json
 import logging
 import socket
-from datetime import UTC, datetime
+import time
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from datetime import UTC, datetime, timedelta, tzinfo
+from functools import partial
 from typing import (
+    TYPE_CHECKING,
     Any,
 )
 
@@ -20,7 +25,15 @@ from .const import (
     CONTENT_TYPE,
     LOGIN_URL,
     STATUS_URL,
+    STREAM_CHUNK_SIZE,
+    WindowMode,
 )
+from .json_stream import JsonItemStream
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable, Iterator
+
+    from .loop_monitor import LoopLagMonitor
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,15 +47,21 @@ class MedtrumEasyViewApiClient:
         password: of the medtrum easyview account
         base_url: For API calls depending on your location
         Session: aiottp object for the open session
+        monitor: optional loop lag monitor deciding where responses are decoded
+        window: time window of the polled data, see `WindowMode`
+        time_zone: of the patient for the local day and rolling windows
 
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         username: str,
         password: str,
         base_url: str,
         session: aiohttp.ClientSession,
+        monitor: LoopLagMonitor | None = None,
+        window: WindowMode = WindowMode.UTC_DAY,
+        time_zone: tzinfo = UTC,
     ) -> None:
         """Sample API Client."""
         self._username = username
@@ -50,6 +69,15 @@ class MedtrumEasyViewApiClient:
         self.login_url = base_url + LOGIN_URL
         self.status_url = base_url + STATUS_URL
         self._session = session
+        self.monitor = monitor
+        self.window = window
+        self.time_zone = time_zone
+        # Status URL of the current window with the time it stays valid until,
+        # it is only rebuilt when the window moves.
+        self._window_url: tuple[int, str] | None = None
+        # Last polled status, returned as is while the payload does not change.
+        self.payload_cache = PayloadCache()
+        self._snapshot: Any = None
 
     async def async_login(self) -> Any:
         """Get token from the API."""
@@ -83,23 +111,32 @@ class MedtrumEasyViewApiClient:
         return self.uid
 
     async def async_get_data(self) -> Any:
-        """Get data from the API."""
-        # Create param with base64 encoded timestamp data for current day
-        now = datetime.now(UTC)
-        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day.replace(
-            hour=23, minute=59, second=59, microsecond=999999
-        )
-
-        param_data = {
-            "ts": [int(start_of_day.timestamp()), int(end_of_day.timestamp())],
-            "tz": 0,  # UTC+0
-        }
-        param_encoded = base64.b64encode(json.dumps(param_data).encode()).decode()
+        """Get data from the API for the current window."""
+        with self._phase("request"):
+            now = datetime.now(UTC)
+            if self._window_url is None or now.timestamp() > self._window_url[0]:
+                start, end, tz_offset = self._current_window(now)
+                self._window_url = (
+                    int(end.timestamp()),
+                    self._range_url(start, end, tz_offset),
+                )
+                _LOGGER.debug("New data window: %s - %s", start, end)
 
-        url = self.status_url.replace("$userid", self.uid) + f"?param={param_encoded}"
+        return await self._async_get_status(
+            self._window_url[1], cache=self.payload_cache
+        )
 
-        response = await api_wrapper(
+    async def _async_get_status(
+        self, url: str, cache: PayloadCache | None = None
+    ) -> Any:
+        """
+        Get the status data from the API.
+
+        With a cache, the previous status object itself is returned when the
+        payload did not change, so callers can skip it with an identity check.
+        """
+        request = partial(
+            api_wrapper,
             self._session,
             method="get",
             url=url,
@@ -109,29 +146,107 @@ class MedtrumEasyViewApiClient:
                 "Content-Type": CONTENT_TYPE,
             },
             data={},
+            monitor=self.monitor,
+            cache=cache,
         )
+        try:
+            response = await request()
+        except MedtrumEasyViewApiAuthenticationError:
+            # The session expired, log in again once before giving up.
+            _LOGGER.debug("Session expired, logging in again")
+            await self.async_login()
+            response = await request()
+
+        if cache is not None and cache.unchanged and self._snapshot is not None:
+            return self._snapshot
+
+        with self._phase("status"):
+            _LOGGER.debug(
+                "Return API Status: %s",
+                response,
+            )
 
-        # handle cookie expiration
+            # API status return 0 if everything goes well.
+            # if response["error"] == 0:
+            data = response["data"]
 
-        _LOGGER.debug(
-            "Return API Status: %s",
-            response,
-        )
+            # Add uid, realname to the data for later use.
+            data["uid"] = self.uid
+            data["realname"] = self.realname
 
-        # API status return 0 if everything goes well.
-        # if response["error"] == 0:
-        data = response["data"]
+            _LOGGER.debug(
+                "Raw data: %s",
+                data,
+            )
 
-        # Add uid, realname to the data for later use.
-        data["uid"] = self.uid
-        data["realname"] = self.realname
+            if cache is not None:
+                self._snapshot = data
+        return data
 
-        _LOGGER.debug(
-            "Raw data: %s",
-            data,
-        )
+    def _phase(self, name: str) -> AbstractContextManager[None]:
+        """Measure a synchronous section with the monitor, if any."""
+        if self.monitor is None:
+            return nullcontext()
+        return self.monitor.phase(name)
 
-        return data
+    async def async_stream_range(
+        self,
+        start: datetime,
+        end: datetime,
+        decode: Callable[[list[tuple[str, Any]]], list[Any]] | None = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Stream the data from the API for a time range.
+
+        The response is decoded while it is received and its items are yielded
+        as (path, value) tuples, see `JsonItemStream`, so large ranges can be
+        fetched with a constant memory usage. With `decode`, the values it
+        returns for the items of each chunk are yielded instead.
+        """
+        async for item in api_stream_wrapper(
+            self._session,
+            method="get",
+            url=self._range_url(start, end),
+            headers={
+                "AppTag": APP_TAG,
+                "Accept": CONTENT_TYPE,
+                "Content-Type": CONTENT_TYPE,
+            },
+            data={},
+            decode=decode,
+        ):
+            yield item
+
+    def _current_window(self, now: datetime) -> tuple[datetime, datetime, float]:
+        """Return the start, end and UTC offset in hours of the polled window."""
+        if self.window == WindowMode.UTC_DAY:
+            start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            return start, start + timedelta(days=1, seconds=-1), 0
+
+        local_now = now.astimezone(self.time_zone)
+        if self.window == WindowMode.ROLLING_24H:
+            # The window moves by whole hours so its URL is built once per hour.
+            hour = now.replace(minute=0, second=0, microsecond=0)
+            start = hour - timedelta(hours=23)
+            end = hour + timedelta(hours=1, seconds=-1)
+        else:
+            # Aware datetime arithmetic is on wall time, DST days end at midnight.
+            start = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+            end = start + timedelta(days=1, seconds=-1)
+
+        offset = (local_now.utcoffset() or timedelta()).total_seconds() / 3600
+        return start, end, int(offset) if offset.is_integer() else offset
+
+    def _range_url(self, start: datetime, end: datetime, tz_offset: float = 0) -> str:
+        """Return the status URL for a time range."""
+        # Create param with base64 encoded timestamp data for the range
+        param_data = {
+            "ts": [int(start.timestamp()), int(end.timestamp())],
+            "tz": tz_offset,  # UTC offset in hours
+        }
+        param_encoded = base64.b64encode(json.dumps(param_data).encode()).decode()
+
+        return self.status_url.replace("$userid", self.uid) + f"?param={param_encoded}"
 
 
 ################################################################
@@ -140,15 +255,24 @@ class MedtrumEasyViewApiClient:
 
 
 @staticmethod
-async def api_wrapper(
+async def api_wrapper(  # noqa: PLR0913
     session: aiohttp.ClientSession,
     method: str,
     url: str,
     data: dict | None = None,
     headers: dict | None = None,
+    monitor: LoopLagMonitor | None = None,
+    cache: PayloadCache | None = None,
 ) -> Any:
-    """Get information from the API."""
-    try:
+    """
+    Get information from the API.
+
+    With a cache, the request is conditional when the server gave validators
+    and an unchanged payload returns the previously decoded response.
+    """
+    if cache is not None:
+        headers = {**(headers or {}), **cache.conditional_headers(url)}
+    with _api_errors():
         async with asyncio.timeout(API_TIME_OUT_SECONDS):
             response = await session.request(
                 method=method,
@@ -158,12 +282,28 @@ async def api_wrapper(
             )
             _LOGGER.debug("response.status: %s", response.status)
             if response.status in (401, 403):
-                raise MedtrumEasyViewApiAuthenticationError(  # noqa:TRY003,TRY301
+                raise MedtrumEasyViewApiAuthenticationError(  # noqa: TRY003
                     "Invalid credentials",  # noqa: EM101
                 )
+            if cache is not None and response.status == 304:  # noqa: PLR2004
+                return cache.hit()
             response.raise_for_status()
-            return await response.json()
-
+            body = await response.read()
+        if cache is None:
+            return await _async_decode(body, monitor)
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if cache.matches(digest):
+            return cache.hit()
+        return cache.store(url, response, digest, await _async_decode(body, monitor))
+
+
+@contextmanager
+def _api_errors() -> Iterator[None]:
+    """Map the errors of a request to the exceptions of the API client."""
+    try:
+        yield
+    except MedtrumEasyViewApiError:
+        raise
     except TimeoutError as exception:
         raise MedtrumEasyViewCommunicationError(  # noqa: TRY003
             "Timeout error fetching information",  # noqa: EM101
@@ -172,10 +312,149 @@ async def api_wrapper(
         raise MedtrumEasyViewCommunicationError(  # noqa: TRY003
             "Error fetching information",  # noqa: EM101
         ) from exception
+    except ValueError as exception:
+        # A truncated or corrupted body, the next poll usually gets a valid one.
+        raise MedtrumEasyViewCommunicationError(  # noqa: TRY003
+            "Invalid response",  # noqa: EM101
+        ) from exception
     except Exception as exception:  # pylint: disable=broad-except
         raise MedtrumEasyViewApiError("Something really wrong happened!") from exception  # noqa: TRY003,EM101
 
 
+async def _async_decode(body: bytes, monitor: LoopLagMonitor | None) -> Any:
+    """Decode a JSON body, in the executor if it would block the loop too long."""
+    if monitor is not None and monitor.should_offload(len(body)):
+        return await asyncio.get_running_loop().run_in_executor(None, json.loads, body)
+
+    start = time.perf_counter()
+    data = json.loads(body)
+    if monitor is not None:
+        monitor.record_decode(len(body), time.perf_counter() - start)
+    return data
+
+
+async def api_stream_wrapper(  # noqa: PLR0913
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    data: dict | None = None,
+    headers: dict | None = None,
+    decode: Callable[[list[tuple[str, Any]]], list[Any]] | None = None,
+) -> AsyncIterator[Any]:
+    """
+    Stream the items of a JSON response from the API.
+
+    The incremental parser is pure Python and would block the loop for a
+    large response, each chunk is parsed, and decoded, in the executor.
+    """
+    loop = asyncio.get_running_loop()
+    stream = JsonItemStream()
+    with _api_errors():
+        async with asyncio.timeout(API_TIME_OUT_SECONDS):
+            response = await session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                json=data,
+            )
+        async with response:
+            _LOGGER.debug("response.status: %s", response.status)
+            if response.status in (401, 403):
+                raise MedtrumEasyViewApiAuthenticationError(  # noqa: TRY003
+                    "Invalid credentials",  # noqa: EM101
+                )
+            response.raise_for_status()
+
+            chunks = response.content.iter_chunked(STREAM_CHUNK_SIZE)
+            while True:
+                # The timeout applies to each chunk, not to the whole range.
+                async with asyncio.timeout(API_TIME_OUT_SECONDS):
+                    chunk = await anext(chunks, None)
+                if chunk is None:
+                    break
+                for item in await loop.run_in_executor(
+                    None, _parse_chunk, stream, chunk, decode
+                ):
+                    yield item
+        for item in await loop.run_in_executor(
+            None, _parse_chunk, stream, None, decode
+        ):
+            yield item
+
+
+def _parse_chunk(
+    stream: JsonItemStream,
+    chunk: bytes | None,
+    decode: Callable[[list[tuple[str, Any]]], list[Any]] | None,
+) -> list[Any]:
+    """Parse a chunk, None for the end of the document, run in the executor."""
+    items = stream.close() if chunk is None else stream.feed(chunk)
+    return items if decode is None else decode(items)
+
+
+class PayloadCache:
+    """
+    Fingerprint of the last response of a poll with its decoded content.
+
+    Attributes:
+        unchanged: whether the last response had the same payload as the one before
+        hits: number of responses that were not decoded again
+        misses: number of responses that were decoded
+
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self.unchanged = False
+        self.hits = 0
+        self.misses = 0
+        self._digest: bytes | None = None
+        self._decoded: Any = None
+        # URL and validators given by the server for conditional requests.
+        self._validators: tuple[str, dict[str, str]] | None = None
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Return the headers making a request to the URL conditional."""
+        if self._validators is None or self._validators[0] != url:
+            return {}
+        return self._validators[1]
+
+    def matches(self, digest: bytes) -> bool:
+        """Return True if a payload digest is the one of the cached response."""
+        return self._decoded is not None and digest == self._digest
+
+    def hit(self) -> Any:
+        """Count an unchanged payload and return the cached response."""
+        self.unchanged = True
+        self.hits += 1
+        return self._decoded
+
+    def store(
+        self, url: str, response: aiohttp.ClientResponse, digest: bytes, decoded: Any
+    ) -> Any:
+        """Keep a new decoded response and return it."""
+        self.unchanged = False
+        self.misses += 1
+        self._digest = digest
+        self._decoded = decoded
+        validators = {}
+        if etag := response.headers.get("ETag"):
+            validators["If-None-Match"] = etag
+        if last_modified := response.headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = last_modified
+        self._validators = (url, validators) if validators else None
+        return decoded
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the cache counters."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+
 class MedtrumEasyViewApiError(Exception):
     """Exception to indicate a general API error."""
 
@@ -125,6 +125,7 @@ class MedtrumEasyViewBinarySensor(MedtrumEasyViewDevice, BinarySensorEntity):
                 )[2:].upper(),
                 "User ID": self.coordinator.data["uid"],
                 "Patient": self.coordinator.data["realname"],
+                **super().extra_state_attributes,
             }
 
-        return None
+        return super().extra_state_attributes
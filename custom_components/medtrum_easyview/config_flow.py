@@ -7,6 +7,7 @@ import logging
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_PASSWORD, CONF_UNIT_OF_MEASUREMENT, CONF_USERNAME
+from homeassistant.core import callback
 from homeassistant.helpers import selector
 from homeassistant.helpers.aiohttp_client import async_create_clientsession
 
@@ -16,7 +17,27 @@ from .api import (
     MedtrumEasyViewApiError,
     MedtrumEasyViewCommunicationError,
 )
-from .const import BASE_URL_LIST, COUNTRY, COUNTRY_LIST, DOMAIN, LOGGER, MG_DL, MMOL_L
+from .const import (
+    BASE_URL_LIST,
+    CONF_GRACE_PERIOD_MIN,
+    CONF_LOOP_BUDGET_MS,
+    CONF_OFFLOAD_THRESHOLD_KB,
+    CONF_RETENTION_DAYS,
+    CONF_SNAPSHOT_FILE,
+    CONF_WINDOW,
+    COUNTRY,
+    COUNTRY_LIST,
+    DEFAULT_GRACE_PERIOD_MIN,
+    DEFAULT_LOOP_BUDGET_MS,
+    DEFAULT_OFFLOAD_THRESHOLD_KB,
+    DEFAULT_RETENTION_DAYS,
+    DEFAULT_WINDOW,
+    DOMAIN,
+    LOGGER,
+    MG_DL,
+    MMOL_L,
+    WindowMode,
+)
 
 # GVS: Init logger
 _LOGGER = logging.getLogger(__name__)
@@ -27,6 +48,14 @@ class MedtrumEasyViewFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,  # noqa: ARG004
+    ) -> MedtrumEasyViewOptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return MedtrumEasyViewOptionsFlowHandler()
+
     async def async_step_user(
         self,
         user_input: dict | None = None,
@@ -99,3 +128,95 @@ class MedtrumEasyViewFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
         await client.async_login()
+
+
+class MedtrumEasyViewOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for Medtrum EasyView."""
+
+    async def async_step_init(
+        self,
+        user_input: dict | None = None,
+    ) -> config_entries.ConfigFlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_WINDOW,
+                        default=options.get(CONF_WINDOW, DEFAULT_WINDOW),
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[mode.value for mode in WindowMode],
+                            translation_key=CONF_WINDOW,
+                        ),
+                    ),
+                    vol.Required(
+                        CONF_RETENTION_DAYS,
+                        default=options.get(
+                            CONF_RETENTION_DAYS, DEFAULT_RETENTION_DAYS
+                        ),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=1,
+                            max=3650,
+                            step=1,
+                            unit_of_measurement="d",
+                            mode=selector.NumberSelectorMode.BOX,
+                        ),
+                    ),
+                    vol.Required(
+                        CONF_GRACE_PERIOD_MIN,
+                        default=options.get(
+                            CONF_GRACE_PERIOD_MIN, DEFAULT_GRACE_PERIOD_MIN
+                        ),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0,
+                            max=1440,
+                            step=1,
+                            unit_of_measurement="min",
+                            mode=selector.NumberSelectorMode.BOX,
+                        ),
+                    ),
+                    vol.Required(
+                        CONF_OFFLOAD_THRESHOLD_KB,
+                        default=options.get(
+                            CONF_OFFLOAD_THRESHOLD_KB, DEFAULT_OFFLOAD_THRESHOLD_KB
+                        ),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0,
+                            max=65536,
+                            step=1,
+                            unit_of_measurement="KiB",
+                            mode=selector.NumberSelectorMode.BOX,
+                        ),
+                    ),
+                    vol.Required(
+                        CONF_LOOP_BUDGET_MS,
+                        default=options.get(
+                            CONF_LOOP_BUDGET_MS, DEFAULT_LOOP_BUDGET_MS
+                        ),
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=1,
+                            max=10000,
+                            step=1,
+                            unit_of_measurement="ms",
+                            mode=selector.NumberSelectorMode.BOX,
+                        ),
+                    ),
+                    vol.Optional(
+                        CONF_SNAPSHOT_FILE,
+                        description={
+                            "suggested_value": options.get(CONF_SNAPSHOT_FILE)
+                        },
+                    ): selector.TextSelector(),
+                }
+            ),
+        )
@@ -28,6 +28,97 @@ MG_DL = "mg/dL"
 MMOL_DL_TO_MG_DL = 18
 REFRESH_RATE_MIN = 1
 API_TIME_OUT_SECONDS = 20
+STREAM_CHUNK_SIZE = 64 * 1024
+# A pump update older than this many polls is reported as stale.
+STALE_AFTER_REFRESHES = 15
+
+# Options
+CONF_RETENTION_DAYS = "retention_days"
+DEFAULT_RETENTION_DAYS = 90
+CONF_WINDOW = "window"
+CONF_GRACE_PERIOD_MIN = "grace_period_min"
+DEFAULT_GRACE_PERIOD_MIN = 15
+CONF_OFFLOAD_THRESHOLD_KB = "offload_threshold_kb"
+DEFAULT_OFFLOAD_THRESHOLD_KB = 256
+CONF_LOOP_BUDGET_MS = "loop_budget_ms"
+DEFAULT_LOOP_BUDGET_MS = 50
+
+# Event loop monitor
+LOOP_PROBE_INTERVAL_SECONDS = 5
+LOOP_WARNING_INTERVAL_SECONDS = 600
+
+# Local reading log
+# Entry data key of the patient uid, the local data files are named after it.
+CONF_UID = "uid"
+HISTORY_FILE_SUFFIX = ".readings"
+HISTORY_INDEX_STRIDE = 256
+HISTORY_COMPACT_INTERVAL_HOURS = 24
+HISTORY_BACKFILL_MAX_DAYS = 30
+HISTORY_BACKFILL_MIN_GAP_MIN = 10
+HISTORY_BACKFILL_BATCH_SIZE = 1000
+
+# Export
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_CLOUD_CHUNK_DAYS = 1
+EXPORT_FORMATS = ["csv", "ndjson", "parquet"]
+EXPORT_SOURCES = ["local", "cloud"]
+EVENT_EXPORT_PROGRESS = f"{DOMAIN}_export_progress"
+
+# Headless poller
+CONF_SNAPSHOT_FILE = "snapshot_file"
+SNAPSHOT_MAX_AGE_MIN = 5
+SNAPSHOT_TAIL_SIZE = 16 * 1024 * 1024
+POLLER_CONNECTIONS_PER_WORKER = 100
+POLLER_SINK_MAX_SIZE = 256 * 1024 * 1024
+
+# Events
+EVENT_NEW_READING = f"{DOMAIN}_new_reading"
+SIGNAL_NEW_READINGS = f"{DOMAIN}_new_readings_{{}}"
+EVENT_SEEN_MAX_SIZE = 512
+
+# Rollups: tier name -> (bucket size in seconds, retention in days or None to
+# follow the reading log retention)
+ROLLUP_TIERS = {
+    "5min": (300, 7),
+    "hour": (3600, None),
+    "day": (86400, None),
+}
+ROLLUP_STATISTICS_INTERVAL_MIN = 60
+# Insulin delivered over a longer polling gap has no known time.
+ROLLUP_MAX_GAP_MIN = 30
+
+# Pump status accounting
+PUMP_STATES_FILE_SUFFIX = ".pump_states"
+PUMP_STATES_STORAGE_VERSION = 1
+PUMP_STATES_SAVE_DELAY_SECONDS = 300
+PUMP_STATES_MAX_GAP_MIN = 30
+PUMP_STATES_PATCHES_KEPT = 3
+
+# Websocket series
+SERIES_ENCODINGS = ["delta", "base64"]
+SERIES_VALUE_SCALE = 1000
+# About two weeks of readings every minute in a single message.
+SERIES_MAX_POINTS = 20000
+
+# Entity attributes
+ATTR_STALE = "stale"
+ATTR_DATA_AGE = "data_age_seconds"
+
+# Services
+SERVICE_QUERY_READINGS = "query_readings"
+SERVICE_EXPORT = "export"
+SERVICE_GET_ROLLUPS = "get_rollups"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_TYPES = "types"
+ATTR_FILENAME = "filename"
+ATTR_FORMAT = "format"
+ATTR_SOURCE = "source"
+ATTR_TIER = "tier"
+ATTR_LIMIT = "limit"
+# Larger ranges are meant to be exported to a file.
+QUERY_READINGS_MAX_LIMIT = 10000
 
 # Icons
 GLUCOSE_VALUE_ICON = "mdi:diabetes"
@@ -41,6 +132,20 @@ BASAL_ICON = "mdi:water-sync"
 BOLUS_ICON = "mdi:water-plus"
 VOLUME_ICON = "mdi:gauge"
 REMAINING_TIME_ICON = "mdi:clock-end"
+SUSPENDED_ICON = "mdi:pause-circle-outline"
+
+
+class WindowMode(StrEnum):
+    """Time window of the polled data."""
+
+    UTC_DAY = "utc_day"
+    LOCAL_DAY = "local_day"
+    ROLLING_24H = "rolling_24h"
+
+
+DEFAULT_WINDOW = WindowMode.LOCAL_DAY
+# The headless poller does not know the time zone of the patients.
+POLLER_WINDOW = WindowMode.UTC_DAY
 
 
 class DeviceType(StrEnum):
@@ -50,6 +155,28 @@ class DeviceType(StrEnum):
     SENSOR = "sensor"
 
 
+class ReadingType(IntEnum):
+    """Type of a reading stored in the local reading log."""
+
+    GLUCOSE = 1
+    BASAL_RATE = 2
+    BOLUS = 3
+    BASAL_SUM = 4
+    BOLUS_SUM = 5
+    IOB = 6
+    REMAINING_DOSE = 7
+    PUMP_STATUS = 8
+
+
+ROLLUP_READING_TYPES = {
+    ReadingType.GLUCOSE,
+    ReadingType.BASAL_RATE,
+    ReadingType.BOLUS,
+    ReadingType.BASAL_SUM,
+    ReadingType.BOLUS_SUM,
+}
+
+
 class PumpStatus(IntEnum):
     """Pump status enum."""
 
@@ -85,3 +212,13 @@ class PumpStatus(IntEnum):
 
     # Special states
     DELIVERY_STOPPED = 128
+
+
+PUMP_SUSPENDED_STATES = {
+    PumpStatus.LOW_SUSPEND,
+    PumpStatus.PREDICTIVE_LOW_SUSPEND,
+    PumpStatus.AUTO_OFF,
+    PumpStatus.EXCEEDS_MAX_1_HOUR_DELIVERY,
+    PumpStatus.EXCEEDS_MAX_TDD,
+    PumpStatus.SUSPEND,
+}
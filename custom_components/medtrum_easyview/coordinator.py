@@ -3,23 +3,59 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta
+from functools import partial
 from typing import TYPE_CHECKING, Any
 
+from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .api import (
     MedtrumEasyViewApiAuthenticationError,
     MedtrumEasyViewApiClient,
     MedtrumEasyViewApiError,
+    MedtrumEasyViewCommunicationError,
 )
-from .const import DOMAIN, LOGGER, REFRESH_RATE_MIN
+from .const import (
+    ATTR_DATA_AGE,
+    ATTR_STALE,
+    CONF_GRACE_PERIOD_MIN,
+    CONF_RETENTION_DAYS,
+    DEFAULT_GRACE_PERIOD_MIN,
+    DEFAULT_RETENTION_DAYS,
+    DOMAIN,
+    EVENT_NEW_READING,
+    HISTORY_BACKFILL_BATCH_SIZE,
+    HISTORY_BACKFILL_MAX_DAYS,
+    HISTORY_BACKFILL_MIN_GAP_MIN,
+    LOGGER,
+    REFRESH_RATE_MIN,
+    SIGNAL_NEW_READINGS,
+    STALE_AFTER_REFRESHES,
+    ReadingType,
+)
+from .history import (
+    Reading,
+    ReadingLog,
+    ReadingStreamDecoder,
+    SeenSet,
+    async_iter_readings,
+    extract_readings,
+)
+from .pump_states import PumpStateTracker
+from .rollups import Rollup, RollupStatistics, RollupStore, build_rollups
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.core import HomeAssistant
 
+    from .loop_monitor import LoopLagMonitor
+    from .poller import SnapshotFileSource
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -28,28 +64,280 @@ class MedtrumEasyViewDataUpdateCoordinator(DataUpdateCoordinator):
 
     config_entry: ConfigEntry
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         hass: HomeAssistant,
         client: MedtrumEasyViewApiClient,
+        reading_log: ReadingLog,
+        unit_of_measurement: str,
+        monitor: LoopLagMonitor,
+        source: SnapshotFileSource | None = None,
     ) -> None:
         """Initialize."""
         self.client = client
+        # Snapshots published by the headless poller replace the polls of
+        # the API when configured.
+        self.source = source or client
+        self.reading_log = reading_log
+        self.monitor = monitor
+        # Most recent stored reading when starting, the readings missed since
+        # then are fetched by `async_backfill_history`.
+        self._backfill_since = max(reading_log.last_timestamps.values(), default=None)
+        self.rollups = RollupStore(self.source.window)
+        self._seen = SeenSet()
+        # The pump update stored before a restart was already announced.
+        if (
+            last_update := reading_log.last_timestamps.get(ReadingType.PUMP_STATUS)
+        ) is not None:
+            self._seen.add(("updateTime", last_update))
+        # Wall clock time of the last successful poll and whether the last
+        # known data is served because of a communication error.
+        self._last_success: float | None = None
+        self._serving_last_known = False
+        # Staleness the entities were last updated with.
+        self._notified_stale = False
+        self.rollup_statistics = RollupStatistics(
+            hass, client.uid, client.realname, unit_of_measurement
+        )
+        self.pump_states = PumpStateTracker(hass, client.uid)
 
         super().__init__(
             hass=hass,
             logger=LOGGER,
             name=DOMAIN,
             update_interval=timedelta(minutes=REFRESH_RATE_MIN),
+            # Polls returning the previous data object do not update entities.
+            always_update=False,
         )
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Update data via library."""
         try:
-            return await self.client.async_get_data()
+            data = await self.source.async_get_data()
         except MedtrumEasyViewApiAuthenticationError as exception:
             _LOGGER.debug("Exception: authentication error during coordinator update")
             raise ConfigEntryAuthFailed(exception) from exception
+        except MedtrumEasyViewCommunicationError as exception:
+            # Keep the entities available with the last known data for a while,
+            # a flaky cloud must not make them flap.
+            if self._within_grace_period():
+                _LOGGER.debug("Serving last known data: %s", exception)
+                self._serving_last_known = True
+                self._async_notify_stale_change()
+                return self.data
+            _LOGGER.debug("Exception: communication error during coordinator update")
+            raise UpdateFailed(exception) from exception
         except MedtrumEasyViewApiError as exception:
             _LOGGER.debug("Exception: general API error during coordinator update")
             raise UpdateFailed(exception) from exception
+
+        self._last_success = time.time()
+        self._serving_last_known = False
+
+        if data is self.data:
+            # Same payload as the previous poll, there is nothing to store.
+            self._async_notify_stale_change()
+            return data
+
+        # Keep a local copy of the readings, a failure here must not make
+        # the entities unavailable.
+        try:
+            readings = await self.hass.async_add_executor_job(
+                self._store_readings, data
+            )
+        except OSError as exception:
+            _LOGGER.warning("Unable to store readings: %s", exception)
+            readings = extract_readings(data)
+        else:
+            with self.monitor.phase("rollups"):
+                self.rollups.add(readings)
+            if readings:
+                with self.monitor.phase("dispatch"):
+                    async_dispatcher_send(
+                        self.hass,
+                        SIGNAL_NEW_READINGS.format(self.config_entry.entry_id),
+                        readings,
+                    )
+
+        with self.monitor.phase("pump_states"):
+            self.pump_states.update(data.get("pump_status"))
+        with self.monitor.phase("events"):
+            self._fire_new_reading(data, readings)
+
+        return data
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners."""
+        self._notified_stale = self.stale
+        with self.monitor.phase("listeners"):
+            super().async_update_listeners()
+
+    def daily_totals(self) -> Rollup:
+        """Return the basal and bolus delivered since local midnight."""
+        return self.rollups.current_day(int(time.time()))
+
+    @property
+    def data_age(self) -> float | None:
+        """Return the age in seconds of the last pump update."""
+        update_time = ((self.data or {}).get("pump_status") or {}).get("updateTime")
+        if update_time is None:
+            return None
+        return max(0.0, time.time() - update_time)
+
+    @property
+    def stale(self) -> bool:
+        """Return True if the last known data is served or is too old."""
+        if self._serving_last_known:
+            return True
+        age = self.data_age
+        return age is not None and age > STALE_AFTER_REFRESHES * REFRESH_RATE_MIN * 60
+
+    @property
+    def staleness_attributes(self) -> dict[str, Any]:
+        """Return the staleness attributes of the entities."""
+        if not self.stale:
+            return {ATTR_STALE: False}
+        age = self.data_age
+        return {
+            ATTR_STALE: True,
+            ATTR_DATA_AGE: None if age is None else int(age),
+        }
+
+    @callback
+    def _async_notify_stale_change(self) -> None:
+        """Update the entities if the data became stale or fresh again."""
+        # Unchanged data does not update the entities, but their staleness
+        # attributes and availability still follow the age of the data.
+        if self.stale != self._notified_stale:
+            self.async_update_listeners()
+
+    def _retention_days(self) -> float:
+        """Return the retention of the reading log in days."""
+        return self.config_entry.options.get(
+            CONF_RETENTION_DAYS, DEFAULT_RETENTION_DAYS
+        )
+
+    def _grace_period(self) -> float:
+        """Return the grace period in seconds."""
+        return 60 * self.config_entry.options.get(
+            CONF_GRACE_PERIOD_MIN, DEFAULT_GRACE_PERIOD_MIN
+        )
+
+    def _within_grace_period(self) -> bool:
+        """Return True if the last known data can still be served."""
+        return (
+            self.data is not None
+            and self._last_success is not None
+            and time.time() - self._last_success < self._grace_period()
+        )
+
+    def _fire_new_reading(self, data: dict[str, Any], readings: list[Reading]) -> None:
+        """Fire a single event per patient when new data has arrived."""
+        new = [
+            reading
+            for reading in readings
+            if self._seen.add((reading.type, reading.timestamp))
+        ]
+        update_time = (data.get("pump_status") or {}).get("updateTime")
+        pump_updated = update_time is not None and self._seen.add(
+            ("updateTime", int(update_time))
+        )
+        if not new and not pump_updated:
+            return
+
+        self.hass.bus.async_fire(
+            EVENT_NEW_READING,
+            {
+                "config_entry_id": self.config_entry.entry_id,
+                "uid": data["uid"],
+                "update_time": update_time,
+                "readings": [
+                    {
+                        "time": reading.timestamp,
+                        "type": reading.type.name.lower(),
+                        "value": reading.value,
+                    }
+                    for reading in sorted(new)
+                ],
+            },
+        )
+
+    def _store_readings(self, data: dict[str, Any]) -> list[Reading]:
+        """Extract and store the readings of a snapshot, run in the executor."""
+        return self.reading_log.append(extract_readings(data))
+
+    async def async_compact_history(self, _now: datetime | None = None) -> None:
+        """Drop the readings older than the retention period."""
+        retention_days = self._retention_days()
+        oldest = int(time.time()) - int(retention_days * 86400)
+        try:
+            await self.hass.async_add_executor_job(self.reading_log.compact, oldest)
+        except OSError as exception:
+            _LOGGER.warning("Unable to compact reading log: %s", exception)
+        self.rollups.prune(int(time.time()), retention_days)
+
+    async def async_load_rollups(self) -> None:
+        """Rebuild the rollups from the reading log."""
+        self.rollups = await self.hass.async_add_executor_job(
+            build_rollups,
+            self.reading_log,
+            int(time.time()),
+            self._retention_days(),
+            self.source.window,
+        )
+
+    async def async_import_statistics(self, _now: datetime | None = None) -> None:
+        """Import the completed hourly rollups as statistics."""
+        await self.rollup_statistics.async_import(self.rollups)
+
+    async def async_backfill_history(self) -> None:
+        """Fetch the readings missed while Home Assistant was not running."""
+        until = int(time.time())
+        oldest = until - HISTORY_BACKFILL_MAX_DAYS * 86400
+        since = max(self._backfill_since or oldest, oldest)
+        if until - since < HISTORY_BACKFILL_MIN_GAP_MIN * 60:
+            return
+
+        # The range is streamed so a multi-week catch-up does not need to hold
+        # the whole response in memory.
+        stored = 0
+        batch: list[Reading] = []
+        decoder = ReadingStreamDecoder()
+        try:
+            async for reading in async_iter_readings(
+                self.client,
+                dt_util.utc_from_timestamp(since),
+                dt_util.utc_from_timestamp(until),
+                decoder,
+            ):
+                if since < reading.timestamp < until:
+                    batch.append(reading)
+                if len(batch) >= HISTORY_BACKFILL_BATCH_SIZE:
+                    stored += len(await self._async_store_backfill(batch))
+                    batch = []
+            stored += len(await self._async_store_backfill(batch))
+        except (MedtrumEasyViewApiError, OSError) as exception:
+            _LOGGER.warning("Unable to backfill reading log: %s", exception)
+            return
+        if not decoder.series_readings:
+            # Only the latest status snapshot was received, see _SERIES_FIELDS.
+            _LOGGER.warning(
+                "No series readings recognized in the range response since %s, "
+                "the readings missed while Home Assistant was not running are "
+                "not in the local reading log",
+                dt_util.utc_from_timestamp(since),
+            )
+        _LOGGER.debug("Backfilled %s readings since %s", stored, since)
+        if stored:
+            # Backfilled readings are older than the live ones, rebuilding
+            # keeps the delivered basal consistent.
+            await self.async_load_rollups()
+
+    async def _async_store_backfill(self, batch: list[Reading]) -> list[Reading]:
+        """Append a batch of backfilled readings to the log."""
+        if not batch:
+            return []
+        return await self.hass.async_add_executor_job(
+            partial(self.reading_log.append, batch, backfill=True)
+        )
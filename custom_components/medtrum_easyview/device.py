@@ -3,12 +3,12 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import ATTRIBUTION, DOMAIN, NAME, VERSION
+from .const import ATTR_DATA_AGE, ATTRIBUTION, DOMAIN, NAME, VERSION
 
 if TYPE_CHECKING:
     from .coordinator import MedtrumEasyViewDataUpdateCoordinator
@@ -26,6 +26,8 @@ class MedtrumEasyViewDevice(CoordinatorEntity):
 
     _attr_has_entity_name = True
     _attr_attribution = ATTRIBUTION
+    # The data age changes with every poll, it is not worth recording.
+    _unrecorded_attributes = frozenset({ATTR_DATA_AGE})
 
     def __init__(
         self,
@@ -42,3 +44,8 @@ class MedtrumEasyViewDevice(CoordinatorEntity):
             model=VERSION,
             manufacturer=NAME,
         )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the staleness of the data."""
+        return self.coordinator.staleness_attributes
@@ -0,0 +1,31 @@
+"""Diagnostics support for Medtrum EasyView."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.core import HomeAssistant
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME, "realname", "uid"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "data": async_redact_data(coordinator.data, TO_REDACT),
+        "reading_log": {"readings": len(coordinator.reading_log)},
+        "event_loop": coordinator.monitor.as_dict(),
+        "payload_cache": coordinator.client.payload_cache.as_dict(),
+    }
@@ -0,0 +1,260 @@
+"""Streaming export of Medtrum EasyView readings."""
+
+from __future__ import annotations
+
+import csv
+import importlib.util
+import json
+import logging
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import EVENT_EXPORT_PROGRESS, EXPORT_CHUNK_SIZE, EXPORT_CLOUD_CHUNK_DAYS
+from .history import Reading, ReadingStreamDecoder, async_iter_readings
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Iterator
+    from pathlib import Path
+
+    from homeassistant.core import HomeAssistant
+
+    from .api import MedtrumEasyViewApiClient
+    from .const import ReadingType
+    from .coordinator import MedtrumEasyViewDataUpdateCoordinator
+    from .history import ReadingLog
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_FIELDS = ("time", "type", "value")
+
+
+class ExportWriter(ABC):
+    """Base class of the export writers, every method runs in the executor."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the writer, the file is only created by `open`."""
+        self.path = path
+
+    @abstractmethod
+    def open(self) -> None:
+        """Create the export file."""
+
+    @abstractmethod
+    def write(self, readings: list[Reading]) -> None:
+        """Write a chunk of readings."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Flush and close the export file."""
+
+
+class CsvExportWriter(ExportWriter):
+    """Export readings to a CSV file."""
+
+    def open(self) -> None:
+        """Create the export file and write the header."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_FIELDS)
+
+    def write(self, readings: list[Reading]) -> None:
+        """Write a chunk of readings."""
+        self._writer.writerows(_rows(readings))
+
+    def close(self) -> None:
+        """Flush and close the export file."""
+        self._file.close()
+
+
+class NdjsonExportWriter(ExportWriter):
+    """Export readings to a newline delimited JSON file."""
+
+    def open(self) -> None:
+        """Create the export file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("w", encoding="utf-8")
+
+    def write(self, readings: list[Reading]) -> None:
+        """Write a chunk of readings."""
+        self._file.write(
+            "".join(
+                json.dumps(dict(zip(EXPORT_FIELDS, row, strict=True))) + "\n"
+                for row in _rows(readings)
+            )
+        )
+
+    def close(self) -> None:
+        """Flush and close the export file."""
+        self._file.close()
+
+
+class ParquetExportWriter(ExportWriter):
+    """Export readings to a Parquet file, one row group per chunk."""
+
+    def open(self) -> None:
+        """Create the export file."""
+        # pyarrow is an optional dependency, see `parquet_available`.
+        import pyarrow as pa  # noqa: PLC0415
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("time", pa.timestamp("s", tz="UTC")),
+                ("type", pa.string()),
+                ("value", pa.float64()),
+            ]
+        )
+        self._writer = pq.ParquetWriter(self.path, self._schema)
+
+    def write(self, readings: list[Reading]) -> None:
+        """Write a chunk of readings."""
+        table = self._pa.Table.from_pydict(
+            {
+                "time": [reading.timestamp for reading in readings],
+                "type": [reading.type.name.lower() for reading in readings],
+                "value": [reading.value for reading in readings],
+            },
+            schema=self._schema,
+        )
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        """Flush and close the export file."""
+        self._writer.close()
+
+
+EXPORT_WRITERS: dict[str, type[ExportWriter]] = {
+    "csv": CsvExportWriter,
+    "ndjson": NdjsonExportWriter,
+    "parquet": ParquetExportWriter,
+}
+
+
+def parquet_available() -> bool:
+    """Return True if the optional Parquet dependency is installed."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+async def async_export(  # noqa: PLR0913
+    hass: HomeAssistant,
+    coordinator: MedtrumEasyViewDataUpdateCoordinator,
+    writer: ExportWriter,
+    start: int,
+    end: int,
+    source: str,
+    types: set[ReadingType] | None,
+) -> int:
+    """Stream the readings of [start, end] to the writer, return the row count."""
+    if source == "cloud":
+        chunks = _cloud_chunks(coordinator.client, start, end, types)
+    else:
+        chunks = _local_chunks(hass, coordinator.reading_log, start, end, types)
+
+    rows = 0
+    await hass.async_add_executor_job(writer.open)
+    try:
+        async for chunk, position in chunks:
+            await hass.async_add_executor_job(writer.write, chunk)
+            rows += len(chunk)
+            hass.bus.async_fire(
+                EVENT_EXPORT_PROGRESS,
+                {
+                    "config_entry_id": coordinator.config_entry.entry_id,
+                    "filename": str(writer.path),
+                    "rows": rows,
+                    "progress": _progress(start, end, position),
+                },
+            )
+    finally:
+        await hass.async_add_executor_job(writer.close)
+
+    _LOGGER.debug("Exported %s readings to %s", rows, writer.path)
+    return rows
+
+
+def _rows(readings: Iterable[Reading]) -> Iterator[tuple[str, str, float]]:
+    """Convert readings to export rows."""
+    for reading in readings:
+        yield (
+            dt_util.utc_from_timestamp(reading.timestamp).isoformat(),
+            reading.type.name.lower(),
+            reading.value,
+        )
+
+
+def _progress(start: int, end: int, position: int) -> int:
+    """Return the export progress in percent."""
+    if end <= start:
+        return 100
+    return max(0, min(100, int((position - start) * 100 / (end - start))))
+
+
+def _next_chunk(readings: Iterator[Reading]) -> list[Reading]:
+    """Read the next chunk of readings, run in the executor."""
+    return list(islice(readings, EXPORT_CHUNK_SIZE))
+
+
+async def _local_chunks(
+    hass: HomeAssistant,
+    reading_log: ReadingLog,
+    start: int,
+    end: int,
+    types: set[ReadingType] | None,
+) -> AsyncIterator[tuple[list[Reading], int]]:
+    """Yield chunks of readings from the local reading log."""
+    readings = await hass.async_add_executor_job(reading_log.query, start, end, types)
+    while chunk := await hass.async_add_executor_job(_next_chunk, readings):
+        yield chunk, chunk[-1].timestamp
+
+
+async def _cloud_chunks(
+    client: MedtrumEasyViewApiClient,
+    start: int,
+    end: int,
+    types: set[ReadingType] | None,
+) -> AsyncIterator[tuple[list[Reading], int]]:
+    """Yield chunks of readings streamed from the status endpoint."""
+    step = EXPORT_CLOUD_CHUNK_DAYS * 86400
+    series_readings = 0
+    for chunk_start in range(start, end + 1, step):
+        chunk_end = min(chunk_start + step - 1, end)
+        chunk: list[Reading] = []
+        decoder = ReadingStreamDecoder()
+        async for reading in async_iter_readings(
+            client,
+            dt_util.utc_from_timestamp(chunk_start),
+            dt_util.utc_from_timestamp(chunk_end),
+            decoder,
+        ):
+            # Range responses also hold the latest status snapshot, keep it
+            # only in the chunk it belongs to.
+            if not chunk_start <= reading.timestamp <= chunk_end or (
+                types is not None and reading.type not in types
+            ):
+                continue
+            chunk.append(reading)
+            if len(chunk) >= EXPORT_CHUNK_SIZE:
+                yield chunk, reading.timestamp
+                chunk = []
+        if chunk:
+            yield chunk, chunk_end
+        if not decoder.series_readings:
+            _LOGGER.warning(
+                "No series readings recognized in the range response of %s",
+                dt_util.utc_from_timestamp(chunk_start),
+            )
+        series_readings += decoder.series_readings
+
+    if not series_readings:
+        # Only status snapshots, see _SERIES_FIELDS, do not report success.
+        raise HomeAssistantError(  # noqa: TRY003
+            "No readings recognized in the cloud responses, "  # noqa: EM101
+            "the export is incomplete"
+        )
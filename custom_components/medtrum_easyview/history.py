@@ -0,0 +1,426 @@
+"""Append-only local reading log for Medtrum EasyView."""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, BinaryIO, NamedTuple
+
+from .const import EVENT_SEEN_MAX_SIZE, HISTORY_INDEX_STRIDE, ReadingType
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Iterator
+    from datetime import datetime
+    from pathlib import Path
+
+    from .api import MedtrumEasyViewApiClient
+
+_LOGGER = logging.getLogger(__name__)
+
+# File layout: a fixed header followed by fixed size records.
+# Record: uint32 timestamp, uint16 reading type, 2 padding bytes, float64 value.
+_HEADER = b"MTEVLOG\x01"
+_RECORD = struct.Struct("<IHxxd")
+_READ_CHUNK_RECORDS = 4096
+
+# Readings found in a status snapshot:
+# (status key, timestamp key, value key, reading type)
+_SNAPSHOT_FIELDS = (
+    ("sensor_status", "updateTime", "glucose", ReadingType.GLUCOSE),
+    ("pump_status", "updateTime", "basalRate", ReadingType.BASAL_RATE),
+    ("pump_status", "bolusDeliveriedTime", "bolusDeliveried", ReadingType.BOLUS),
+    ("pump_status", "updateTime", "basalSum", ReadingType.BASAL_SUM),
+    ("pump_status", "updateTime", "bolusSum", ReadingType.BOLUS_SUM),
+    ("pump_status", "updateTime", "iob", ReadingType.IOB),
+    ("pump_status", "updateTime", "remainingDose", ReadingType.REMAINING_DOSE),
+    ("pump_status", "updateTime", "status", ReadingType.PUMP_STATUS),
+)
+
+# Arrays of readings found in the data of range responses, items are either
+# [timestamp, value, ...] lists or objects with a time and a value.
+# The EasyView API is not documented and these keys are not confirmed by a
+# captured range response: they follow the glucose, basal and bolus charts of
+# the EasyView app. Unknown keys are ignored, a range response with another
+# layout only brings the readings of its status objects.
+_SERIES_FIELDS = {
+    "glucose": ReadingType.GLUCOSE,
+    "basal": ReadingType.BASAL_RATE,
+    "bolus": ReadingType.BOLUS,
+}
+_SERIES_TIME_KEYS = ("time", "updateTime", "ts")
+_DATA_PATH = "data."
+
+
+class Reading(NamedTuple):
+    """A single timestamped reading."""
+
+    timestamp: int
+    type: ReadingType
+    value: float
+
+
+def extract_readings(data: dict[str, Any]) -> list[Reading]:
+    """Extract the readings contained in a status snapshot."""
+    readings = []
+    for status_key, time_key, value_key, reading_type in _SNAPSHOT_FIELDS:
+        status = data.get(status_key) or {}
+        timestamp = status.get(time_key)
+        value = status.get(value_key)
+        if timestamp is None or value is None:
+            continue
+        try:
+            readings.append(Reading(int(timestamp), reading_type, float(value)))
+        except (TypeError, ValueError):
+            _LOGGER.debug("Ignoring invalid %s value: %s", value_key, value)
+
+    for key, reading_type in _SERIES_FIELDS.items():
+        series = (_series_reading(reading_type, item) for item in data.get(key) or ())
+        readings.extend(reading for reading in series if reading is not None)
+    return readings
+
+
+class ReadingStreamDecoder:
+    """
+    Decode readings from the items of a streamed range response.
+
+    Items of the series arrays are converted as they arrive, the scalars of the
+    status objects are small and kept until the end of the stream.
+
+    Attributes:
+        series_readings: number of readings decoded from the series arrays
+
+    """
+
+    def __init__(self) -> None:
+        """Initialize the decoder."""
+        self.series_readings = 0
+        self._snapshot: dict[str, dict[str, Any]] = {}
+
+    def feed(self, path: str, value: Any) -> Reading | None:
+        """Decode an item, return its reading if it is part of a series."""
+        if not path.startswith(_DATA_PATH):
+            return None
+        keys = path[len(_DATA_PATH) :].split(".")
+        if len(keys) == 1 and keys[0] in _SERIES_FIELDS:
+            reading = _series_reading(_SERIES_FIELDS[keys[0]], value)
+            if reading is not None:
+                self.series_readings += 1
+            return reading
+        if len(keys) == 2:  # noqa: PLR2004
+            self._snapshot.setdefault(keys[0], {})[keys[1]] = value
+        return None
+
+    def decode(self, items: list[tuple[str, Any]]) -> list[Reading]:
+        """Decode the items of a chunk, return the readings of the series."""
+        return [
+            reading
+            for path, value in items
+            if (reading := self.feed(path, value)) is not None
+        ]
+
+    def finish(self) -> list[Reading]:
+        """Return the readings of the status objects."""
+        return extract_readings(self._snapshot)
+
+
+async def async_iter_readings(
+    client: MedtrumEasyViewApiClient,
+    start: datetime,
+    end: datetime,
+    decoder: ReadingStreamDecoder | None = None,
+) -> AsyncIterator[Reading]:
+    """Stream the readings of a time range, decoded in the executor."""
+    decoder = decoder or ReadingStreamDecoder()
+    async for reading in client.async_stream_range(start, end, decoder.decode):
+        yield reading
+    for reading in decoder.finish():
+        yield reading
+
+
+class SeenSet:
+    """Bounded set of already seen keys, the oldest ones are evicted first."""
+
+    def __init__(self, max_size: int = EVENT_SEEN_MAX_SIZE) -> None:
+        """Initialize an empty set."""
+        self._max_size = max_size
+        self._keys: OrderedDict[Any, None] = OrderedDict()
+
+    def add(self, key: Any) -> bool:
+        """Add a key, return True if it was not seen yet."""
+        if key in self._keys:
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self._max_size:
+            self._keys.popitem(last=False)
+        return True
+
+
+def _series_reading(reading_type: ReadingType, item: Any) -> Reading | None:
+    """Convert an item of a series array to a reading."""
+    try:
+        if isinstance(item, dict):
+            timestamp = next(
+                item[key] for key in _SERIES_TIME_KEYS if item.get(key) is not None
+            )
+            return Reading(int(timestamp), reading_type, float(item["value"]))
+        return Reading(int(item[0]), reading_type, float(item[1]))
+    except (KeyError, IndexError, StopIteration, TypeError, ValueError):
+        _LOGGER.debug("Ignoring invalid %s item: %s", reading_type.name, item)
+        return None
+
+
+class ReadingLog:
+    """
+    Append-only, memory-mapped log of readings for one patient.
+
+    Records are appended at the end of the file and read back through mmap.
+    Late events (e.g. a bolus reported after a newer pump update) keep the file
+    only mostly sorted, so the sparse index keeps for every block of `stride`
+    records its lowest timestamp and the highest timestamp seen up to it.
+    Both lead to monotonic arrays that can be bisected for range lookups.
+
+    Attributes:
+        path: of the log file
+
+    """
+
+    def __init__(self, path: Path, stride: int = HISTORY_INDEX_STRIDE) -> None:
+        """Initialize the log, the file is only opened by `open`."""
+        self.path = path
+        self._stride = stride
+        self._lock = threading.Lock()
+        self._file: BinaryIO | None = None
+        self._mmap: mmap.mmap | None = None
+        self._count = 0
+        self._block_min: list[int] = []
+        self._prefix_max: list[int] = []
+        self._suffix_min: list[int] | None = None
+        self._last: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        """Return the number of records in the log."""
+        return self._count
+
+    @property
+    def last_timestamps(self) -> dict[int, int]:
+        """Return the most recent timestamp stored for each reading type."""
+        return dict(self._last)
+
+    def open(self) -> None:
+        """Open (or create) the log file and build the sparse index."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if not self.path.exists() or self.path.stat().st_size == 0:
+                self.path.write_bytes(_HEADER)
+            with self.path.open("rb") as file:
+                valid = file.read(len(_HEADER)) == _HEADER
+            if not valid:
+                # Keep the unreadable file for inspection and start a new log.
+                corrupt = self.path.with_suffix(self.path.suffix + ".corrupt")
+                _LOGGER.warning(
+                    "%s is not a Medtrum EasyView reading log, moved to %s",
+                    self.path,
+                    corrupt,
+                )
+                self.path.replace(corrupt)
+                self.path.write_bytes(_HEADER)
+            self._file = self.path.open("r+b")
+
+            # Drop a partially written trailing record (crash during append).
+            size = self.path.stat().st_size
+            extra = (size - len(_HEADER)) % _RECORD.size
+            if extra:
+                _LOGGER.warning("Truncating %s bytes from %s", extra, self.path)
+                self._file.truncate(size - extra)
+            self._rebuild_index()
+
+    def delete(self) -> None:
+        """Delete the log file and the files derived from it, the log is closed."""
+        for suffix in ("", ".tmp", ".corrupt"):
+            self.path.with_suffix(self.path.suffix + suffix).unlink(missing_ok=True)
+        _LOGGER.debug("Deleted %s", self.path)
+
+    def close(self) -> None:
+        """Close the log file."""
+        with self._lock:
+            # Mapped views still held by running queries keep their mmap alive,
+            # it is closed once they are garbage collected.
+            self._mmap = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def append(
+        self, readings: Iterable[Reading], *, backfill: bool = False
+    ) -> list[Reading]:
+        """
+        Append the readings that are newer than the stored ones, return them.
+
+        With `backfill`, readings older than the stored ones are appended too,
+        unless the log already holds a reading of the same type and time.
+        """
+        readings = sorted(readings)
+        with self._lock:
+            if self._file is None:
+                msg = "Reading log is not open"
+                raise RuntimeError(msg)
+            stored: set[tuple[int, ReadingType]] = set()
+            if backfill and readings:
+                stored = {
+                    (reading.timestamp, reading.type)
+                    for reading in self._query(
+                        readings[0].timestamp, readings[-1].timestamp, None
+                    )
+                }
+            new = []
+            for reading in readings:
+                if backfill:
+                    key = (reading.timestamp, reading.type)
+                    if key in stored:
+                        continue
+                    stored.add(key)
+                elif reading.timestamp <= self._last.get(reading.type, -1):
+                    continue
+                new.append(reading)
+                self._index_record(reading.timestamp, reading.type)
+            if new:
+                self._file.seek(0, os.SEEK_END)
+                self._file.write(b"".join(_RECORD.pack(*reading) for reading in new))
+                self._file.flush()
+            return new
+
+    def query(
+        self,
+        start: int,
+        end: int,
+        types: set[ReadingType] | None = None,
+    ) -> Iterator[Reading]:
+        """Iterate over the readings in [start, end], in file order."""
+        with self._lock:
+            return self._query(start, end, types)
+
+    def compact(self, oldest: int) -> int:
+        """Rewrite the log without the readings older than `oldest`."""
+        with self._lock:
+            if self._file is None or not self._block_min:
+                return 0
+            if min(self._block_min) >= oldest:
+                return 0
+            mapped = self._map()
+            kept = 0
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp_path.open("wb") as tmp:
+                tmp.write(_HEADER)
+                for offset in range(0, self._count, _READ_CHUNK_RECORDS):
+                    records = [
+                        record
+                        for record in _RECORD.iter_unpack(
+                            self._slice(mapped, offset, _READ_CHUNK_RECORDS)
+                        )
+                        if record[0] >= oldest
+                    ]
+                    tmp.write(b"".join(_RECORD.pack(*record) for record in records))
+                    kept += len(records)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            removed = self._count - kept
+            self._file.close()
+            tmp_path.replace(self.path)
+            self._file = self.path.open("r+b")
+            self._rebuild_index()
+        _LOGGER.debug("Compacted %s: %s readings removed", self.path, removed)
+        return removed
+
+    def _query(
+        self, start: int, end: int, types: set[ReadingType] | None
+    ) -> Iterator[Reading]:
+        """Iterate over the readings in [start, end], the caller holds the lock."""
+        if self._count == 0:
+            return iter(())
+        mapped = self._map()
+        first = bisect.bisect_left(self._prefix_max, start) * self._stride
+        stop_block = bisect.bisect_right(self._get_suffix_min(), end)
+        stop = min(self._count, stop_block * self._stride)
+        return self._iter_records(mapped, first, stop, start, end, types)
+
+    def _index_record(self, timestamp: int, reading_type: int) -> None:
+        """Add a record to the sparse index, the caller holds the lock."""
+        block = self._count // self._stride
+        if block == len(self._block_min):
+            previous = self._prefix_max[-1] if self._prefix_max else timestamp
+            self._block_min.append(timestamp)
+            self._prefix_max.append(max(previous, timestamp))
+        else:
+            self._block_min[block] = min(self._block_min[block], timestamp)
+            self._prefix_max[block] = max(self._prefix_max[block], timestamp)
+        self._suffix_min = None
+        self._count += 1
+        self._last[reading_type] = max(self._last.get(reading_type, -1), timestamp)
+
+    def _rebuild_index(self) -> None:
+        """Scan the whole file to rebuild the index, the caller holds the lock."""
+        self._mmap = None
+        self._count = 0
+        self._block_min = []
+        self._prefix_max = []
+        self._suffix_min = None
+        self._last = {}
+        count = (self.path.stat().st_size - len(_HEADER)) // _RECORD.size
+        if count == 0:
+            return
+        mapped = self._map()
+        for offset in range(0, count, _READ_CHUNK_RECORDS):
+            for timestamp, reading_type, _ in _RECORD.iter_unpack(
+                self._slice(mapped, offset, min(_READ_CHUNK_RECORDS, count - offset))
+            ):
+                self._index_record(timestamp, reading_type)
+
+    def _get_suffix_min(self) -> list[int]:
+        """Return, per block, the lowest timestamp of this and later blocks."""
+        if self._suffix_min is None:
+            suffix_min = list(self._block_min)
+            for block in range(len(suffix_min) - 2, -1, -1):
+                suffix_min[block] = min(suffix_min[block], suffix_min[block + 1])
+            self._suffix_min = suffix_min
+        return self._suffix_min
+
+    def _map(self) -> mmap.mmap:
+        """Return a read-only mapping covering the whole file."""
+        size = len(_HEADER) + self._count * _RECORD.size
+        if self._mmap is None or len(self._mmap) < size:
+            # The previous mapping is not closed as running queries may still
+            # use it, appends never modify the bytes it covers.
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    @staticmethod
+    def _slice(mapped: mmap.mmap, offset: int, count: int) -> bytes:
+        """Return the bytes of `count` records starting at record `offset`."""
+        start = len(_HEADER) + offset * _RECORD.size
+        return mapped[start : start + count * _RECORD.size]
+
+    def _iter_records(  # noqa: PLR0913
+        self,
+        mapped: mmap.mmap,
+        first: int,
+        stop: int,
+        start: int,
+        end: int,
+        types: set[ReadingType] | None,
+    ) -> Iterator[Reading]:
+        """Yield the matching records between the `first` and `stop` records."""
+        for offset in range(first, stop, _READ_CHUNK_RECORDS):
+            count = min(_READ_CHUNK_RECORDS, stop - offset)
+            for timestamp, reading_type, value in _RECORD.iter_unpack(
+                self._slice(mapped, offset, count)
+            ):
+                if timestamp < start or timestamp > end:
+                    continue
+                if types is not None and reading_type not in types:
+                    continue
+                yield Reading(timestamp, ReadingType(reading_type), value)
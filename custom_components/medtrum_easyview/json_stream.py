@@ -0,0 +1,160 @@
+"""Incremental JSON decoder for large Medtrum EasyView responses."""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Any
+
+# A lexeme is a structural character, a complete string, a bare scalar or spaces.
+_LEXEME = re.compile(r'[{}\[\]:,]|"(?:[^"\\]|\\.)*"|[^{}\[\]:,"\s]+|\s+')
+_STRUCTURAL = "{}[]:,"
+_OPENING = ("{", "[")
+_CLOSING = ("}", "]")
+
+
+class JsonStreamError(ValueError):
+    """Exception to indicate an invalid JSON stream."""
+
+
+class JsonItemStream:
+    """
+    Incremental JSON decoder yielding the items of a document.
+
+    Chunks of bytes are fed as they are received and complete items are
+    returned as (path, value) tuples, with path the dotted keys leading to them:
+    - every element of an array, decoded as a whole,
+    - every scalar member of an object that is not inside an array.
+    Only the unparsed tail and the array element being decoded are buffered,
+    so memory does not depend on the document size.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty stream."""
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        # One entry per open container: [kind, key of the member being parsed]
+        self._stack: list[list[Any]] = []
+        self._path: list[str] = []
+        # Start offset and nesting depth of the array element being captured.
+        self._capture_start: int | None = None
+        self._capture_depth = 0
+
+    def feed(self, chunk: bytes) -> list[tuple[str, Any]]:
+        """Parse a chunk of the document, return the completed items."""
+        self._buffer += self._decoder.decode(chunk)
+        return self._parse(final=False)
+
+    def close(self) -> list[tuple[str, Any]]:
+        """Parse the end of the document, return the completed items."""
+        self._buffer += self._decoder.decode(b"", final=True)
+        items = self._parse(final=True)
+        if self._stack or self._buffer[self._pos :].strip():
+            msg = "Truncated JSON document"
+            raise JsonStreamError(msg)
+        return items
+
+    def _parse(self, *, final: bool) -> list[tuple[str, Any]]:
+        """Consume the complete tokens of the buffer."""
+        items: list[tuple[str, Any]] = []
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer):
+            match = _LEXEME.match(buffer, pos)
+            if match is None:
+                # Unterminated string, wait for the next chunk.
+                break
+            lexeme = match.group()
+            if (
+                not final
+                and match.end() == len(buffer)
+                and lexeme[0] not in _STRUCTURAL
+                and lexeme[0] != '"'
+            ):
+                # A bare scalar may continue in the next chunk.
+                break
+            pos = match.end()
+            if not lexeme[0].isspace():
+                self._handle(lexeme, match.start(), items)
+
+        # Drop the consumed text, keeping the element being captured.
+        keep = pos if self._capture_start is None else self._capture_start
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        if self._capture_start is not None:
+            self._capture_start = 0
+        return items
+
+    def _handle(self, lexeme: str, start: int, items: list[tuple[str, Any]]) -> None:
+        """Update the parser state with a lexeme."""
+        if self._capture_start is not None:
+            self._handle_capture(lexeme, start, items)
+            return
+
+        top = self._stack[-1] if self._stack else None
+        if top is not None and top[0] == "[":
+            if lexeme == "]":
+                self._pop()
+            elif lexeme != ",":
+                # Start of an array element, it is decoded once complete.
+                self._capture_start = start
+                self._capture_depth = 1 if lexeme in _OPENING else 0
+            return
+
+        if lexeme in _OPENING:
+            if top is not None:
+                self._path.append(top[1])
+            self._stack.append([lexeme, None])
+        elif lexeme == "}":
+            self._pop()
+        elif lexeme == ":":
+            return
+        elif lexeme == "," and top is not None:
+            top[1] = None
+        elif top is not None and top[1] is None:
+            top[1] = self._decode(lexeme)
+        else:
+            path = [*self._path, top[1]] if top is not None else self._path
+            items.append((".".join(path), self._decode(lexeme)))
+
+    def _handle_capture(
+        self, lexeme: str, start: int, items: list[tuple[str, Any]]
+    ) -> None:
+        """Track the end of the array element being captured."""
+        if lexeme in _OPENING:
+            self._capture_depth += 1
+            return
+        if self._capture_depth > 0:
+            if lexeme in _CLOSING:
+                self._capture_depth -= 1
+            return
+        if lexeme in (",", "]"):
+            items.append(
+                (
+                    ".".join(self._path),
+                    self._decode(self._buffer[self._capture_start : start]),
+                )
+            )
+            self._capture_start = None
+            if lexeme == "]":
+                self._pop()
+
+    def _pop(self) -> None:
+        """Close the innermost container."""
+        if not self._stack:
+            msg = "Unbalanced JSON document"
+            raise JsonStreamError(msg)
+        self._stack.pop()
+        if self._stack:
+            self._path.pop()
+
+    @staticmethod
+    def _decode(text: str) -> Any:
+        """Decode a JSON value."""
+        try:
+            return json.loads(text)
+        except ValueError as exception:
+            msg = f"Invalid JSON value: {text[:50]}"
+            raise JsonStreamError(msg) from exception
@@ -0,0 +1,139 @@
+"""Event loop lag monitor for Medtrum EasyView."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+from .const import LOOP_PROBE_INTERVAL_SECONDS, LOOP_WARNING_INTERVAL_SECONDS
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Weight of the last measure in the decode cost average.
+_COST_SMOOTHING = 0.3
+
+
+class LoopLagMonitor:
+    """
+    Measure how long the event loop is blocked.
+
+    A probe scheduled every few seconds measures how late it runs (the loop
+    lag) and `phase` measures the synchronous sections of a poll. Both are
+    compared with the budget and a warning is logged when it is exceeded.
+    The decode cost per byte measured on the loop drives `should_offload`.
+
+    Attributes:
+        budget: maximum time in seconds the loop should be blocked
+        offload_threshold: payload size in bytes above which decode is offloaded
+
+    """
+
+    def __init__(self, budget: float, offload_threshold: int) -> None:
+        """Initialize the monitor, the probe is only started by `start`."""
+        self.budget = budget
+        self.offload_threshold = offload_threshold
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.phases: dict[str, float] = {}
+        self.offloaded = 0
+        self._byte_cost: float | None = None
+        self._handle: asyncio.TimerHandle | None = None
+        self._warned: dict[str, float] = {}
+
+    def start(self) -> None:
+        """Start probing the running loop."""
+        if self._handle is None:
+            self._schedule(asyncio.get_running_loop())
+
+    def stop(self) -> None:
+        """Stop probing the loop."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure a synchronous section running on the loop."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, duration: float) -> None:
+        """Record how long a phase blocked the loop."""
+        self.phases[name] = duration
+        if duration > self.budget:
+            self._warn(
+                name,
+                "%s blocked the event loop for %.0f ms (budget %.0f ms)",
+                name,
+                duration * 1000,
+                self.budget * 1000,
+            )
+
+    def record_decode(self, size: int, duration: float) -> None:
+        """Record a payload decoded on the loop to estimate the decode cost."""
+        self.record("decode", duration)
+        if size <= 0:
+            return
+        cost = duration / size
+        if self._byte_cost is None:
+            self._byte_cost = cost
+        else:
+            self._byte_cost += _COST_SMOOTHING * (cost - self._byte_cost)
+
+    def should_offload(self, size: int) -> bool:
+        """Return True if decoding a payload of this size should leave the loop."""
+        offload = size >= self.offload_threshold or (
+            self._byte_cost is not None and size * self._byte_cost > self.budget
+        )
+        if offload:
+            self.offloaded += 1
+        return offload
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the measures in milliseconds."""
+        return {
+            "lag_ms": round(self.lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "phases_ms": {
+                name: round(duration * 1000, 1)
+                for name, duration in self.phases.items()
+            },
+            "offloaded": self.offloaded,
+        }
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Schedule the next probe."""
+        expected = loop.time() + LOOP_PROBE_INTERVAL_SECONDS
+        self._handle = loop.call_at(expected, self._probe, loop, expected)
+
+    def _probe(self, loop: asyncio.AbstractEventLoop, expected: float) -> None:
+        """Measure how late the probe runs."""
+        self.lag = max(0.0, loop.time() - expected)
+        self.max_lag = max(self.max_lag, self.lag)
+        if self.lag > self.budget:
+            self._warn(
+                "loop",
+                "Event loop lagged by %.0f ms (budget %.0f ms)",
+                self.lag * 1000,
+                self.budget * 1000,
+            )
+        self._schedule(loop)
+
+    def _warn(self, key: str, msg: str, *args: Any) -> None:
+        """Log a warning, at most once per interval for each key."""
+        now = time.monotonic()
+        if now - self._warned.get(key, -LOOP_WARNING_INTERVAL_SECONDS) < (
+            LOOP_WARNING_INTERVAL_SECONDS
+        ):
+            return
+        self._warned[key] = now
+        _LOGGER.warning(msg, *args)
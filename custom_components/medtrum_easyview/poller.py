@@ -0,0 +1,382 @@
+"""
+Headless Medtrum EasyView poller.
+
+This module does not depend on Home Assistant. It polls many accounts with
+`MedtrumEasyViewApiClient`, sharded across a pool of processes each running
+its own event loop and connection pool, and publishes the snapshots to a
+local sink:
+- `file:<path>`: one JSON line per snapshot appended to a file, rotated to
+  `<path>.1` when it grows over `POLLER_SINK_MAX_SIZE`,
+- `unix:<path>`: one JSON line per snapshot sent to a listening Unix socket.
+The integration reads the file sink with `SnapshotFileSource`.
+See `scripts/poller` for the command line.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, BinaryIO
+
+import aiohttp
+
+from .api import (
+    MedtrumEasyViewApiAuthenticationError,
+    MedtrumEasyViewApiClient,
+    MedtrumEasyViewApiError,
+    MedtrumEasyViewCommunicationError,
+)
+from .const import (
+    BASE_URL_LIST,
+    POLLER_CONNECTIONS_PER_WORKER,
+    POLLER_SINK_MAX_SIZE,
+    POLLER_WINDOW,
+    REFRESH_RATE_MIN,
+    SNAPSHOT_MAX_AGE_MIN,
+    SNAPSHOT_TAIL_SIZE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SnapshotSink(ABC):
+    """Base class of the snapshot sinks, one instance per worker."""
+
+    @abstractmethod
+    async def async_publish(self, snapshot: dict[str, Any]) -> None:
+        """Publish a snapshot."""
+
+    @abstractmethod
+    async def async_close(self) -> None:
+        """Release the sink."""
+
+
+class NdjsonFileSink(SnapshotSink):
+    """
+    Append the snapshots to a newline delimited JSON file.
+
+    Each snapshot is written with a single write on a file opened in append
+    mode so the lines of concurrent workers do not interleave. Once the file
+    is larger than `max_size`, it is renamed with a `.1` suffix, replacing the
+    previous one, and the workers start a new file.
+    """
+
+    def __init__(self, path: Path, max_size: int = POLLER_SINK_MAX_SIZE) -> None:
+        """Initialize the sink, the file is opened on the first snapshot."""
+        self.path = path
+        self.max_size = max_size
+        self._fd: int | None = None
+
+    async def async_publish(self, snapshot: dict[str, Any]) -> None:
+        """Append a snapshot."""
+        if self._fd is not None and not self._is_current():
+            # Another worker rotated the file.
+            await self.async_close()
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        os.write(self._fd, _encode(snapshot))
+        if os.fstat(self._fd).st_size > self.max_size:
+            self._rotate()
+            await self.async_close()
+
+    async def async_close(self) -> None:
+        """Close the file."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _is_current(self) -> bool:
+        """Return True if the open file is still the one at the path."""
+        try:
+            return self.path.stat().st_ino == os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _rotate(self) -> None:
+        """Rename the full file, unless another worker already did."""
+        # Workers writing to the same file rename it one at a time.
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if self._is_current():
+                self.path.replace(self.path.with_name(self.path.name + ".1"))
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class UnixSocketSink(SnapshotSink):
+    """Send the snapshots to a Unix socket, reconnecting when needed."""
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the sink, it connects on the first snapshot."""
+        self.path = path
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def async_publish(self, snapshot: dict[str, Any]) -> None:
+        """Send a snapshot, it is dropped if the socket is not listening."""
+        try:
+            if self._writer is None:
+                _, self._writer = await asyncio.open_unix_connection(self.path)
+            self._writer.write(_encode(snapshot))
+            await self._writer.drain()
+        except OSError as exception:
+            _LOGGER.warning("Unable to publish to %s: %s", self.path, exception)
+            await self.async_close()
+
+    async def async_close(self) -> None:
+        """Close the connection."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class SnapshotFileSource:
+    """
+    Read the snapshots of a patient from the file sink of the poller.
+
+    It replaces the API client as the data source of the coordinator. The
+    first read only parses the last `SNAPSHOT_TAIL_SIZE` bytes of the file,
+    the next ones the lines appended since the previous read.
+
+    Attributes:
+        path: of the file sink
+        uid: of the patient
+        window: time window polled by the poller, see `WindowMode`
+
+    """
+
+    def __init__(self, path: Path, uid: str) -> None:
+        """Initialize the source."""
+        self.path = path
+        self.uid = uid
+        self.window = POLLER_WINDOW
+        self._offset: int | None = None
+        self._inode: int | None = None
+        self._snapshot: dict[str, Any] | None = None
+
+    async def async_get_data(self) -> Any:
+        """Return the last snapshot of the patient."""
+        snapshot = await asyncio.get_running_loop().run_in_executor(
+            None, self.read_latest
+        )
+        if snapshot is None:
+            raise MedtrumEasyViewCommunicationError(  # noqa: TRY003
+                f"No snapshot of {self.uid} in {self.path}",  # noqa: EM102
+            )
+        if time.time() - snapshot["time"] > SNAPSHOT_MAX_AGE_MIN * 60:
+            raise MedtrumEasyViewCommunicationError(  # noqa: TRY003
+                f"Last snapshot of {self.uid} in {self.path} is stale",  # noqa: EM102
+            )
+        return snapshot["data"]
+
+    def read_latest(self) -> dict[str, Any] | None:
+        """Read the lines appended since the last call, run in the executor."""
+        try:
+            with self.path.open("rb") as file:
+                stat = os.fstat(file.fileno())
+                if self._offset is None:
+                    self._offset = _tail_offset(file, stat.st_size)
+                elif stat.st_ino != self._inode or stat.st_size < self._offset:
+                    # The file was rotated or truncated.
+                    self._offset = 0
+                self._inode = stat.st_ino
+                file.seek(self._offset)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        # Partial line, read again once complete.
+                        break
+                    self._offset += len(line)
+                    self._parse(line)
+        except OSError as exception:
+            raise MedtrumEasyViewCommunicationError(  # noqa: TRY003
+                f"Unable to read {self.path}",  # noqa: EM102
+            ) from exception
+        return self._snapshot
+
+    def _parse(self, line: bytes) -> None:
+        """Keep the snapshot of a line if it belongs to the patient."""
+        # Most lines belong to other patients, skip them before decoding.
+        if f'"uid": "{self.uid}"'.encode() not in line:
+            return
+        try:
+            snapshot = json.loads(line)
+        except ValueError:
+            _LOGGER.warning("Invalid snapshot line in %s", self.path)
+            return
+        if snapshot.get("uid") == self.uid:
+            self._snapshot = snapshot
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the poller from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Poll Medtrum EasyView accounts and publish their snapshots."
+    )
+    parser.add_argument(
+        "accounts",
+        type=Path,
+        help="JSON lines file of accounts: username, password, country and "
+        "optionally base_url",
+    )
+    parser.add_argument(
+        "--sink", required=True, help="file:<path> or unix:<path> of the sink"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="worker processes"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=REFRESH_RATE_MIN * 60,
+        help="seconds between two polls of an account",
+    )
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args(argv)
+
+    level = logging.DEBUG if args.verbose else logging.INFO
+    logging.basicConfig(level=level)
+    _parse_sink(args.sink)
+    accounts = load_accounts(args.accounts)
+    workers = max(1, min(args.workers, len(accounts)))
+    _LOGGER.info("Polling %s accounts with %s workers", len(accounts), workers)
+
+    # Workers are spawned so they do not inherit the state of this process.
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=run_worker,
+            args=(accounts[shard::workers], args.sink, args.interval, level),
+            name=f"medtrum_easyview_poller_{shard}",
+        )
+        for shard in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Stop the workers on SIGTERM as on an interrupt.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    # Workers poll forever, stop everything as soon as one of them exits.
+    with contextlib.suppress(KeyboardInterrupt):
+        multiprocessing.connection.wait([process.sentinel for process in processes])
+    # Signals sent to the whole group must not interrupt the cleanup.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    failed = [
+        process.name
+        for process in processes
+        if process.exitcode not in (0, -signal.SIGTERM)
+    ]
+    if failed:
+        _LOGGER.error("Workers exited with an error: %s", ", ".join(failed))
+        return 1
+    return 0
+
+
+def load_accounts(path: Path) -> list[dict[str, str]]:
+    """Read the accounts, one JSON object per line."""
+    with path.open(encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def run_worker(
+    accounts: list[dict[str, str]], sink: str, interval: float, level: int
+) -> None:
+    """Poll a shard of the accounts, entry point of a worker process."""
+    logging.basicConfig(level=level)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_async_poll(accounts, _parse_sink(sink), interval))
+
+
+def _encode(snapshot: dict[str, Any]) -> bytes:
+    """Encode a snapshot as a JSON line."""
+    return (json.dumps(snapshot, separators=(", ", ": ")) + "\n").encode()
+
+
+def _tail_offset(file: BinaryIO, size: int) -> int:
+    """Return the offset of the first complete line of the tail of the file."""
+    if size <= SNAPSHOT_TAIL_SIZE:
+        return 0
+    # Older snapshots are stale anyway, skip to the end of the line the tail
+    # starts in.
+    file.seek(size - SNAPSHOT_TAIL_SIZE - 1)
+    file.readline()
+    return file.tell()
+
+
+def _parse_sink(sink: str) -> SnapshotSink:
+    """Create the sink of a `file:` or `unix:` specification."""
+    kind, _, path = sink.partition(":")
+    if kind == "file" and path:
+        return NdjsonFileSink(Path(path))
+    if kind == "unix" and path:
+        return UnixSocketSink(Path(path))
+    msg = f"Invalid sink {sink}, expected file:<path> or unix:<path>"
+    raise SystemExit(msg)
+
+
+async def _async_poll(
+    accounts: list[dict[str, str]], sink: SnapshotSink, interval: float
+) -> None:
+    """Poll the accounts of a worker forever."""
+    loop = asyncio.get_running_loop()
+    connector = aiohttp.TCPConnector(limit=POLLER_CONNECTIONS_PER_WORKER)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        clients = [
+            MedtrumEasyViewApiClient(
+                username=account["username"],
+                password=account["password"],
+                base_url=account.get("base_url")
+                or BASE_URL_LIST.get(account.get("country", ""))
+                or BASE_URL_LIST["Global"],
+                session=session,
+                window=POLLER_WINDOW,
+            )
+            for account in accounts
+        ]
+        try:
+            while True:
+                started = loop.time()
+                await asyncio.gather(
+                    *(_async_poll_client(client, sink) for client in clients)
+                )
+                _LOGGER.debug(
+                    "Polled %s accounts in %.1f s", len(clients), loop.time() - started
+                )
+                await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+        finally:
+            await sink.async_close()
+
+
+async def _async_poll_client(
+    client: MedtrumEasyViewApiClient, sink: SnapshotSink
+) -> None:
+    """Poll an account once and publish its snapshot."""
+    try:
+        if not hasattr(client, "uid"):
+            await client.async_login()
+        data = await client.async_get_data()
+    except MedtrumEasyViewApiAuthenticationError as exception:
+        # Log in again at the next poll.
+        _LOGGER.warning("Authentication error: %s", exception)
+        if hasattr(client, "uid"):
+            del client.uid
+        return
+    except MedtrumEasyViewApiError as exception:
+        _LOGGER.warning("Unable to poll %s: %s", getattr(client, "uid", ""), exception)
+        return
+
+    await sink.async_publish({"uid": client.uid, "time": time.time(), "data": data})
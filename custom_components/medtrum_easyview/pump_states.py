@@ -0,0 +1,189 @@
+"""Pump status duration accounting for Medtrum EasyView."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    PUMP_STATES_FILE_SUFFIX,
+    PUMP_STATES_MAX_GAP_MIN,
+    PUMP_STATES_PATCHES_KEPT,
+    PUMP_STATES_SAVE_DELAY_SECONDS,
+    PUMP_STATES_STORAGE_VERSION,
+    PumpStatus,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PumpStateTracker:
+    """
+    Time spent in and number of entries into each pump status.
+
+    Each pump update is one transition of a state machine: the time since the
+    previous update is added to the previous status and entering another
+    status is counted. Both are kept for the current local day and for each
+    patch, identified by the pump serial, and saved to storage.
+
+    Attributes:
+        day: accounting of the current local day
+        patches: accounting of the last patches by serial number
+
+    """
+
+    def __init__(self, hass: HomeAssistant, uid: str) -> None:
+        """Initialize an empty accounting, `async_load` restores the saved one."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass,
+            PUMP_STATES_STORAGE_VERSION,
+            f"{DOMAIN}/{uid}{PUMP_STATES_FILE_SUFFIX}",
+        )
+        # Status, serial and time of the last pump update.
+        self._current: dict[str, Any] | None = None
+        self.day: dict[str, Any] = _period(0)
+        self.patches: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Restore the saved accounting."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self._current = data["current"]
+        self.day = data["day"]
+        self.patches = data["patches"]
+
+    async def async_save(self) -> None:
+        """Save the accounting now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Delete the saved accounting."""
+        await self._store.async_remove()
+
+    @callback
+    def update(self, pump_status: dict[str, Any] | None) -> None:
+        """Account for a pump update."""
+        if not pump_status:
+            return
+        status = pump_status.get("status")
+        update_time = pump_status.get("updateTime")
+        if status is None or update_time is None:
+            return
+        serial = _serial_key(pump_status.get("serial"))
+        current = self._current
+        if current is not None and update_time <= current["time"]:
+            return
+
+        day_start = _day_start(update_time)
+        start = None
+        if (
+            current is not None
+            and update_time - current["time"] <= PUMP_STATES_MAX_GAP_MIN * 60
+        ):
+            # The pump stayed in the previous status until this update.
+            start = current["time"]
+            key = _status_key(current["status"])
+            if patch := self.patches.get(current["serial"]):
+                _add(patch["durations"], key, update_time - start)
+        if self.day["start"] != day_start:
+            # Only the current day is kept, the time before midnight is dropped.
+            self.day = _period(day_start)
+        if start is not None:
+            _add(self.day["durations"], key, update_time - max(start, day_start))
+
+        if serial is not None and serial not in self.patches:
+            self.patches[serial] = _period(update_time)
+            self._prune_patches()
+        if (
+            current is None
+            or status != current["status"]
+            or serial != current["serial"]
+        ):
+            key = _status_key(status)
+            _add(self.day["counts"], key, 1)
+            if serial is not None:
+                _add(self.patches[serial]["counts"], key, 1)
+
+        self._current = {"status": status, "serial": serial, "time": update_time}
+        self._store.async_delay_save(self._data_to_save, PUMP_STATES_SAVE_DELAY_SECONDS)
+
+    def day_accounting(self, now: float) -> dict[str, Any]:
+        """Return the accounting of the local day containing `now`."""
+        day_start = _day_start(now)
+        if self.day["start"] == day_start:
+            return self.day
+        return _period(day_start)
+
+    @property
+    def patch(self) -> dict[str, Any] | None:
+        """Return the accounting of the current patch."""
+        if self._current is None or self._current["serial"] is None:
+            return None
+        return self.patches.get(self._current["serial"])
+
+    @property
+    def patch_lifetime(self) -> float | None:
+        """Return the seconds between the first and last update of the patch."""
+        if (patch := self.patch) is None:
+            return None
+        return self._current["time"] - patch["start"]
+
+    def _prune_patches(self) -> None:
+        """Keep only the accounting of the last patches."""
+        while len(self.patches) > PUMP_STATES_PATCHES_KEPT:
+            oldest = min(self.patches, key=lambda serial: self.patches[serial]["start"])
+            del self.patches[oldest]
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to save."""
+        return {"current": self._current, "day": self.day, "patches": self.patches}
+
+
+def duration(period: dict[str, Any], states: Iterable[PumpStatus]) -> float:
+    """Return the seconds spent in any of the states during a period."""
+    return sum(period["durations"].get(_status_key(state), 0) for state in states)
+
+
+def count(period: dict[str, Any], states: Iterable[PumpStatus]) -> int:
+    """Return the number of entries into any of the states during a period."""
+    return sum(period["counts"].get(_status_key(state), 0) for state in states)
+
+
+def _period(start: float) -> dict[str, Any]:
+    """Return an empty accounting period."""
+    return {"start": start, "durations": {}, "counts": {}}
+
+
+def _add(totals: dict[str, float], key: str, value: float) -> None:
+    """Add a value to a total."""
+    totals[key] = totals.get(key, 0) + value
+
+
+def _status_key(status: int) -> str:
+    """Return the name of a status, used as accounting key."""
+    try:
+        return PumpStatus(status).name.lower()
+    except ValueError:
+        return f"unknown_{status}"
+
+
+def _serial_key(serial: int | None) -> str | None:
+    """Return the serial number as displayed, in uppercase hexadecimal."""
+    if serial is None:
+        return None
+    return hex(serial)[2:].upper()
+
+
+def _day_start(timestamp: float) -> float:
+    """Return the local midnight before the timestamp."""
+    return dt_util.start_of_local_day(dt_util.utc_from_timestamp(timestamp)).timestamp()
@@ -0,0 +1,356 @@
+"""Multi-resolution rollups of the Medtrum EasyView readings."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    ROLLUP_MAX_GAP_MIN,
+    ROLLUP_READING_TYPES,
+    ROLLUP_TIERS,
+    ReadingType,
+    WindowMode,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from homeassistant.components.recorder.models import (
+        StatisticData,
+        StatisticMetaData,
+    )
+    from homeassistant.core import HomeAssistant
+
+    from .history import Reading, ReadingLog
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR_TIER = "hour"
+DAY_TIER = "day"
+
+# Sums of the pump over the polled window and the rollup attribute of their
+# increments.
+_SUM_ATTRIBUTES = {
+    ReadingType.BASAL_SUM: "basal",
+    ReadingType.BOLUS_SUM: "bolus",
+}
+# Readings derived from the previous one of their type.
+_ORDERED_TYPES = {*_SUM_ATTRIBUTES, ReadingType.BASAL_RATE}
+
+
+def build_rollups(
+    reading_log: ReadingLog, now: int, log_retention_days: float, window: WindowMode
+) -> RollupStore:
+    """Build the rollups from the reading log, run in the executor."""
+    rollups = RollupStore(window)
+    rollups.load(reading_log.query(0, now, ROLLUP_READING_TYPES))
+    rollups.prune(now, log_retention_days)
+    return rollups
+
+
+@dataclass(slots=True)
+class Rollup:
+    """Aggregated readings of one time bucket."""
+
+    start: int
+    glucose_min: float | None = None
+    glucose_max: float | None = None
+    glucose_sum: float = 0.0
+    glucose_count: int = 0
+    basal: float = 0.0
+    bolus: float = 0.0
+
+    @property
+    def glucose_mean(self) -> float | None:
+        """Return the mean glucose of the bucket."""
+        if not self.glucose_count:
+            return None
+        return self.glucose_sum / self.glucose_count
+
+    def add_glucose(self, value: float) -> None:
+        """Add a glucose reading to the bucket."""
+        if self.glucose_min is None or value < self.glucose_min:
+            self.glucose_min = value
+        if self.glucose_max is None or value > self.glucose_max:
+            self.glucose_max = value
+        self.glucose_sum += value
+        self.glucose_count += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the bucket as a dict for service responses."""
+        return {
+            "start": dt_util.utc_from_timestamp(self.start).isoformat(),
+            "glucose_min": self.glucose_min,
+            "glucose_max": self.glucose_max,
+            "glucose_mean": self.glucose_mean,
+            "glucose_count": self.glucose_count,
+            "basal": round(self.basal, 3),
+            "bolus": round(self.bolus, 3),
+        }
+
+
+class RollupStore:
+    """
+    Rollups of the readings of one patient at 5 minutes, hourly and daily tiers.
+
+    Readings are added as they are stored in the reading log, each one updates
+    a single bucket per tier. Daily buckets start at local midnight.
+
+    The basal and bolus sums of the pump cover the polled window and restart
+    with it. With a local or UTC day window, the delivered insulin is derived
+    from their increments, so boluses delivered between two polls are not
+    missed. The rolling 24 hours sums do not restart at a fixed time, so with
+    a rolling window the basal is derived from the basal rate and the bolus
+    from the delivered boluses.
+
+    Attributes:
+        tiers: buckets of each tier by start timestamp
+        window: time window of the polled sums, see `WindowMode`
+
+    """
+
+    def __init__(self, window: WindowMode = WindowMode.LOCAL_DAY) -> None:
+        """Initialize empty rollups."""
+        self.tiers: dict[str, dict[int, Rollup]] = {tier: {} for tier in ROLLUP_TIERS}
+        self.window = window
+        # Time and value of the last sum of each type and of the last basal rate.
+        self._sums: dict[ReadingType, tuple[int, float]] = {}
+        self._basal_rate: tuple[int, float] | None = None
+        self._day: tuple[int, int] = (0, 0)
+
+    def add(self, readings: Iterable[Reading]) -> None:
+        """Add readings to the rollups."""
+        rolling = self.window == WindowMode.ROLLING_24H
+        for reading in readings:
+            if reading.type == ReadingType.GLUCOSE:
+                for rollup in self._buckets(reading.timestamp):
+                    rollup.add_glucose(reading.value)
+            elif not rolling and reading.type in _SUM_ATTRIBUTES:
+                self._add_sum(reading)
+            elif rolling and reading.type == ReadingType.BASAL_RATE:
+                self._add_basal_rate(reading)
+            elif rolling and reading.type == ReadingType.BOLUS:
+                self._add_delivered(
+                    "bolus", self._buckets(reading.timestamp), reading.value
+                )
+
+    def load(self, readings: Iterable[Reading]) -> None:
+        """Add the readings of the reading log, in file order."""
+        # Late sums and basal rates would be ignored, they are the only
+        # readings whose order matters so only they are sorted.
+        ordered = []
+        for reading in readings:
+            if reading.type in _ORDERED_TYPES:
+                ordered.append(reading)
+            else:
+                self.add((reading,))
+        ordered.sort()
+        self.add(ordered)
+
+    def query(self, tier: str, start: int, end: int) -> list[Rollup]:
+        """Return the buckets of a tier starting in [start, end]."""
+        return [
+            rollup
+            for bucket_start, rollup in sorted(self.tiers[tier].items())
+            if start <= bucket_start <= end
+        ]
+
+    def current_day(self, now: int) -> Rollup:
+        """Return the daily bucket of the local day containing `now`."""
+        day_start = self._day_start(now)
+        return self.tiers[DAY_TIER].get(day_start) or Rollup(day_start)
+
+    def prune(self, now: int, log_retention_days: float) -> None:
+        """Drop the buckets older than the retention of their tier."""
+        for tier, (_, retention_days) in ROLLUP_TIERS.items():
+            days = log_retention_days if retention_days is None else retention_days
+            oldest = now - int(days * 86400)
+            buckets = self.tiers[tier]
+            for bucket_start in [start for start in buckets if start < oldest]:
+                del buckets[bucket_start]
+
+    def _buckets(self, timestamp: int) -> list[Rollup]:
+        """Return the bucket of each tier containing the timestamp."""
+        rollups = []
+        for tier, (size, _) in ROLLUP_TIERS.items():
+            if tier == DAY_TIER:
+                bucket_start = self._day_start(timestamp)
+            else:
+                bucket_start = timestamp - timestamp % size
+            buckets = self.tiers[tier]
+            if (rollup := buckets.get(bucket_start)) is None:
+                rollup = buckets[bucket_start] = Rollup(bucket_start)
+            rollups.append(rollup)
+        return rollups
+
+    def _day_start(self, timestamp: int) -> int:
+        """Return the local midnight before the timestamp."""
+        start, end = self._day
+        if not start <= timestamp < end:
+            day = dt_util.start_of_local_day(dt_util.utc_from_timestamp(timestamp))
+            next_day = dt_util.start_of_local_day(day + timedelta(days=1))
+            self._day = (int(day.timestamp()), int(next_day.timestamp()))
+        return self._day[0]
+
+    def _window_start(self, timestamp: int) -> int:
+        """Return the start of the polled day window containing the timestamp."""
+        if self.window == WindowMode.UTC_DAY:
+            return timestamp - timestamp % 86400
+        return self._day_start(timestamp)
+
+    def _add_sum(self, reading: Reading) -> None:
+        """Add the insulin delivered since the previous sum of its type."""
+        previous = self._sums.get(reading.type)
+        if previous is not None and reading.timestamp <= previous[0]:
+            return
+        self._sums[reading.type] = (reading.timestamp, reading.value)
+        window_start = self._window_start(reading.timestamp)
+        if previous is None or previous[0] < window_start:
+            # First sum of the window, the pump sum restarted with it.
+            since, delivered = window_start, reading.value
+        elif reading.value < previous[1]:
+            # The sum was reset by the pump.
+            since, delivered = previous[0], reading.value
+        else:
+            since, delivered = previous[0], reading.value - previous[1]
+
+        if reading.timestamp - since <= ROLLUP_MAX_GAP_MIN * 60:
+            buckets = self._buckets(reading.timestamp)
+        elif since >= self._day_start(reading.timestamp):
+            # Delivered at unknown times of the local day, e.g. before the
+            # first poll, so it only counts in the daily bucket.
+            buckets = [self._day_bucket(reading.timestamp)]
+        else:
+            # Partly delivered during the previous local day, it cannot be split.
+            return
+        self._add_delivered(_SUM_ATTRIBUTES[reading.type], buckets, delivered)
+
+    def _add_basal_rate(self, reading: Reading) -> None:
+        """Add the basal delivered at the previous rate until this one."""
+        previous = self._basal_rate
+        if previous is not None and reading.timestamp <= previous[0]:
+            return
+        self._basal_rate = (reading.timestamp, reading.value)
+        if (
+            previous is None
+            or reading.timestamp - previous[0] > ROLLUP_MAX_GAP_MIN * 60
+        ):
+            return
+        self._add_delivered(
+            "basal",
+            self._buckets(reading.timestamp),
+            previous[1] * (reading.timestamp - previous[0]) / 3600,
+        )
+
+    def _day_bucket(self, timestamp: int) -> Rollup:
+        """Return the daily bucket containing the timestamp."""
+        day_start = self._day_start(timestamp)
+        days = self.tiers[DAY_TIER]
+        if (rollup := days.get(day_start)) is None:
+            rollup = days[day_start] = Rollup(day_start)
+        return rollup
+
+    @staticmethod
+    def _add_delivered(attribute: str, buckets: list[Rollup], delivered: float) -> None:
+        """Add delivered insulin to the basal or bolus of the buckets."""
+        if not delivered:
+            return
+        for rollup in buckets:
+            setattr(rollup, attribute, getattr(rollup, attribute) + delivered)
+
+
+class RollupStatistics:
+    """Import the hourly rollups of a patient as external statistics."""
+
+    def __init__(self, hass: HomeAssistant, uid: str, name: str, unit: str) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self._metadata: dict[str, StatisticMetaData] = {
+            "glucose": {
+                "has_mean": True,
+                "has_sum": False,
+                "name": f"{name} Glucose",
+                "source": DOMAIN,
+                "statistic_id": f"{DOMAIN}:glucose_{uid}",
+                "unit_of_measurement": unit,
+            },
+            "basal": {
+                "has_mean": False,
+                "has_sum": True,
+                "name": f"{name} Basal",
+                "source": DOMAIN,
+                "statistic_id": f"{DOMAIN}:basal_{uid}",
+                "unit_of_measurement": "U",
+            },
+            "bolus": {
+                "has_mean": False,
+                "has_sum": True,
+                "name": f"{name} Bolus",
+                "source": DOMAIN,
+                "statistic_id": f"{DOMAIN}:bolus_{uid}",
+                "unit_of_measurement": "U",
+            },
+        }
+        # Start of the last imported hour and running sums, read from the
+        # recorder on the first import.
+        self._last: dict[str, float] | None = None
+        self._sums: dict[str, float] = {}
+
+    async def async_import(self, rollups: RollupStore) -> None:
+        """Import the completed hours that are not in the recorder yet."""
+        if self._last is None:
+            await self._async_load_last()
+
+        now = dt_util.utcnow().timestamp()
+        statistics: dict[str, list[StatisticData]] = {key: [] for key in self._metadata}
+        for rollup in rollups.query(HOUR_TIER, 0, int(now) - 3600):
+            start = dt_util.utc_from_timestamp(rollup.start)
+            if rollup.glucose_count and rollup.start > self._last["glucose"]:
+                statistics["glucose"].append(
+                    {
+                        "start": start,
+                        "mean": rollup.glucose_mean,
+                        "min": rollup.glucose_min,
+                        "max": rollup.glucose_max,
+                    }
+                )
+                self._last["glucose"] = rollup.start
+            for key, value in (("basal", rollup.basal), ("bolus", rollup.bolus)):
+                if rollup.start > self._last[key]:
+                    self._sums[key] += value
+                    statistics[key].append(
+                        {"start": start, "state": value, "sum": self._sums[key]}
+                    )
+                    self._last[key] = rollup.start
+
+        for key, rows in statistics.items():
+            if rows:
+                async_add_external_statistics(self.hass, self._metadata[key], rows)
+
+    async def _async_load_last(self) -> None:
+        """Read the last imported statistics from the recorder."""
+        self._last = {}
+        for key, metadata in self._metadata.items():
+            statistic_id = metadata["statistic_id"]
+            last = await get_instance(self.hass).async_add_executor_job(
+                get_last_statistics,
+                self.hass,
+                1,
+                statistic_id,
+                True,  # noqa: FBT003
+                {"sum"},
+            )
+            rows = last.get(statistic_id) or [{}]
+            self._last[key] = rows[0].get("start") or 0
+            self._sums[key] = rows[0].get("sum") or 0.0
@@ -12,8 +12,10 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.const import CONF_UNIT_OF_MEASUREMENT
+from homeassistant.util import dt as dt_util
 
 from .const import (
+    ATTR_DATA_AGE,
     BASAL_ICON,
     BOLUS_ICON,
     CLOCK_ICON,
@@ -21,14 +23,17 @@ from .const import (
     GLUCOSE_VALUE_ICON,
     MG_DL,
     PUMP_ICON,
+    PUMP_SUSPENDED_STATES,
     REMAINING_TIME_ICON,
     SENSOR_ICON,
+    SUSPENDED_ICON,
     TIMELINE_ICON,
     VOLUME_ICON,
     DeviceType,
     PumpStatus,
 )
 from .device import MedtrumEasyViewDevice
+from .pump_states import count, duration
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
@@ -40,6 +45,12 @@ if TYPE_CHECKING:
 # GVS: Tuto pour ajouter des log
 _LOGGER = logging.getLogger(__name__)
 
+# Daily volume keys and the matching daily rollup attribute.
+DAILY_TOTAL_KEYS = {
+    "basalSum": "basal",
+    "bolusSum": "bolus",
+}
+
 """ Three sensors are declared:
     Glucose Value
     Glucose Trend
@@ -182,6 +193,46 @@ async def async_setup_entry(
             "U",  # Insulin units
             None,
         ),
+        MedtrumEasyViewPumpStateSensor(
+            coordinator,
+            SensorDeviceClass.DURATION,
+            "suspendedToday",  # key
+            "Pump Suspended Time Today",  # name
+            SUSPENDED_ICON,
+            "min",
+        ),
+        MedtrumEasyViewPumpStateSensor(
+            coordinator,
+            None,
+            "lowSuspendsToday",  # key
+            "Low Suspends Today",  # name
+            SUSPENDED_ICON,
+            None,
+        ),
+        MedtrumEasyViewPumpStateSensor(
+            coordinator,
+            None,
+            "predictiveLowSuspendsToday",  # key
+            "Predictive Low Suspends Today",  # name
+            SUSPENDED_ICON,
+            None,
+        ),
+        MedtrumEasyViewPumpStateSensor(
+            coordinator,
+            SensorDeviceClass.DURATION,
+            "patchLifetime",  # key
+            "Patch Lifetime",  # name
+            TIMELINE_ICON,
+            "min",
+        ),
+        MedtrumEasyViewPumpStateSensor(
+            coordinator,
+            SensorDeviceClass.DURATION,
+            "patchSuspended",  # key
+            "Patch Suspended Time",  # name
+            SUSPENDED_ICON,
+            "min",
+        ),
     ]
 
     async_add_entities(sensors)
@@ -222,6 +273,13 @@ class MedtrumEasyViewSensor(MedtrumEasyViewDevice, SensorEntity):
     @property
     def native_value(self) -> Any:
         """Return the native value of the sensor."""
+        # Daily volumes are kept by the integration so they reset at local
+        # midnight instead of UTC midnight.
+        if self.key in DAILY_TOTAL_KEYS:
+            return round(
+                getattr(self.coordinator.daily_totals(), DAILY_TOTAL_KEYS[self.key]), 3
+            )
+
         if self.coordinator.data is not None:
             value = self.coordinator.data[self.device_type.value + "_status"][self.key]
 
@@ -267,3 +325,71 @@ class MedtrumEasyViewSensor(MedtrumEasyViewDevice, SensorEntity):
     def native_unit_of_measurement(self) -> str | None:
         """Return the native unit of measurement."""
         return self.uom
+
+
+class MedtrumEasyViewPumpStateSensor(MedtrumEasyViewDevice, SensorEntity):
+    """
+    Pump status accounting sensor.
+
+    The values are kept by the coordinator from the pump status transitions,
+    the time spent in and the entries into each status are attributes.
+    """
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    # The per status accounting changes with every poll.
+    _unrecorded_attributes = frozenset({ATTR_DATA_AGE, "durations", "counts"})
+
+    def __init__(  # noqa: PLR0913
+        self,
+        coordinator: MedtrumEasyViewDataUpdateCoordinator,
+        device_class: SensorDeviceClass | None,
+        key: str,
+        name: str,
+        icon: str,
+        unit_of_measurement: str | None,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = (
+            f"{self.coordinator.data['uid']}_{DeviceType.PUMP.value}_{key}"
+        )
+        self._attr_name = name
+        self._attr_device_class = device_class
+        self._attr_icon = icon
+        self._attr_native_unit_of_measurement = unit_of_measurement
+        self.key = key
+
+    @property
+    def period(self) -> dict[str, Any] | None:
+        """Return the accounting period of the sensor."""
+        pump_states = self.coordinator.pump_states
+        if self.key.startswith("patch"):
+            return pump_states.patch
+        return pump_states.day_accounting(dt_util.utcnow().timestamp())
+
+    @property
+    def native_value(self) -> Any:
+        """Return the native value of the sensor."""
+        if (period := self.period) is None:
+            return None
+        if self.key == "patchLifetime":
+            return round(self.coordinator.pump_states.patch_lifetime / 60)
+        if self.key == "lowSuspendsToday":
+            return count(period, {PumpStatus.LOW_SUSPEND})
+        if self.key == "predictiveLowSuspendsToday":
+            return count(period, {PumpStatus.PREDICTIVE_LOW_SUSPEND})
+        return round(duration(period, PUMP_SUSPENDED_STATES) / 60)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the time in minutes spent in and entries into each status."""
+        if (period := self.period) is None:
+            return super().extra_state_attributes
+        return {
+            "durations": {
+                status: round(seconds / 60)
+                for status, seconds in period["durations"].items()
+            },
+            "counts": period["counts"],
+            **super().extra_state_attributes,
+        }
@@ -0,0 +1,227 @@
+"""Services for Medtrum EasyView."""
+
+from __future__ import annotations
+
+import heapq
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .api import MedtrumEasyViewApiError
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_END,
+    ATTR_FILENAME,
+    ATTR_FORMAT,
+    ATTR_LIMIT,
+    ATTR_SOURCE,
+    ATTR_START,
+    ATTR_TIER,
+    ATTR_TYPES,
+    DOMAIN,
+    EXPORT_FORMATS,
+    EXPORT_SOURCES,
+    QUERY_READINGS_MAX_LIMIT,
+    ROLLUP_TIERS,
+    SERVICE_EXPORT,
+    SERVICE_GET_ROLLUPS,
+    SERVICE_QUERY_READINGS,
+    ReadingType,
+)
+from .export import EXPORT_WRITERS, async_export, parquet_available
+
+if TYPE_CHECKING:
+    from .coordinator import MedtrumEasyViewDataUpdateCoordinator
+    from .history import ReadingLog
+
+_LOGGER = logging.getLogger(__name__)
+
+READING_TYPES = [reading_type.name.lower() for reading_type in ReadingType]
+
+QUERY_READINGS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_TYPES): vol.All(cv.ensure_list, [vol.In(READING_TYPES)]),
+        vol.Optional(ATTR_LIMIT, default=QUERY_READINGS_MAX_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=QUERY_READINGS_MAX_LIMIT)
+        ),
+    }
+)
+
+EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_TYPES): vol.All(cv.ensure_list, [vol.In(READING_TYPES)]),
+        vol.Required(ATTR_FILENAME): cv.string,
+        vol.Optional(ATTR_FORMAT, default=EXPORT_FORMATS[0]): vol.In(EXPORT_FORMATS),
+        vol.Optional(ATTR_SOURCE, default=EXPORT_SOURCES[0]): vol.In(EXPORT_SOURCES),
+    }
+)
+
+GET_ROLLUPS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_TIER): vol.In(list(ROLLUP_TIERS)),
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Medtrum EasyView services."""
+
+    async def async_query_readings(call: ServiceCall) -> ServiceResponse:
+        """Return the readings of a patient from the local reading log."""
+        coordinator = _get_coordinator(hass, call)
+        start, end = _get_range(call)
+        types = _get_types(call)
+
+        readings = await hass.async_add_executor_job(
+            _collect_readings,
+            coordinator.reading_log,
+            start,
+            end,
+            types,
+            call.data[ATTR_LIMIT],
+        )
+        return {
+            "readings": readings[: call.data[ATTR_LIMIT]],
+            "truncated": len(readings) > call.data[ATTR_LIMIT],
+        }
+
+    async def async_export_readings(call: ServiceCall) -> ServiceResponse:
+        """Stream the readings of a patient to a file."""
+        coordinator = _get_coordinator(hass, call)
+        start, end = _get_range(call)
+        types = _get_types(call)
+
+        path = Path(hass.config.path(call.data[ATTR_FILENAME]))
+        if not hass.config.is_allowed_path(str(path)):
+            raise ServiceValidationError(  # noqa: TRY003
+                f"Writing to {path} is not allowed"  # noqa: EM102
+            )
+        export_format = call.data[ATTR_FORMAT]
+        if export_format == "parquet" and not parquet_available():
+            raise ServiceValidationError(  # noqa: TRY003
+                "Parquet export requires the pyarrow package"  # noqa: EM101
+            )
+
+        try:
+            rows = await async_export(
+                hass,
+                coordinator,
+                EXPORT_WRITERS[export_format](path),
+                start,
+                end,
+                call.data[ATTR_SOURCE],
+                types,
+            )
+        except (MedtrumEasyViewApiError, OSError) as exception:
+            raise HomeAssistantError(  # noqa: TRY003
+                f"Export to {path} failed: {exception}"  # noqa: EM102
+            ) from exception
+
+        return {"filename": str(path), "rows": rows}
+
+    async def async_get_rollups(call: ServiceCall) -> ServiceResponse:
+        """Return the rollups of a patient for a tier."""
+        coordinator = _get_coordinator(hass, call)
+        start, end = _get_range(call)
+
+        return {
+            "rollups": [
+                rollup.as_dict()
+                for rollup in coordinator.rollups.query(
+                    call.data[ATTR_TIER], start, end
+                )
+            ]
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_READINGS,
+        async_query_readings,
+        schema=QUERY_READINGS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT,
+        async_export_readings,
+        schema=EXPORT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_ROLLUPS,
+        async_get_rollups,
+        schema=GET_ROLLUPS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def _get_coordinator(
+    hass: HomeAssistant, call: ServiceCall
+) -> MedtrumEasyViewDataUpdateCoordinator:
+    """Return the coordinator of the config entry targeted by the call."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+    if coordinator is None:
+        raise ServiceValidationError(  # noqa: TRY003
+            f"No loaded Medtrum EasyView entry with id {entry_id}"  # noqa: EM102
+        )
+    return coordinator
+
+
+def _get_range(call: ServiceCall) -> tuple[int, int]:
+    """Return the [start, end] timestamps requested by the call."""
+    start = dt_util.as_utc(call.data[ATTR_START])
+    end = dt_util.as_utc(call.data.get(ATTR_END) or dt_util.utcnow())
+    if end < start:
+        raise ServiceValidationError(  # noqa: TRY003
+            "The end of the range is before its start"  # noqa: EM101
+        )
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def _get_types(call: ServiceCall) -> set[ReadingType] | None:
+    """Return the reading types requested by the call, None for all."""
+    if ATTR_TYPES not in call.data:
+        return None
+    return {ReadingType[name.upper()] for name in call.data[ATTR_TYPES]}
+
+
+def _collect_readings(
+    reading_log: ReadingLog,
+    start: int,
+    end: int,
+    types: set[ReadingType] | None,
+    limit: int,
+) -> list[dict]:
+    """Read the first `limit` + 1 readings from the log, run in the executor."""
+    return [
+        {
+            "time": dt_util.utc_from_timestamp(reading.timestamp).isoformat(),
+            "type": reading.type.name.lower(),
+            "value": reading.value,
+        }
+        for reading in heapq.nsmallest(limit + 1, reading_log.query(start, end, types))
+    ]
@@ -0,0 +1,195 @@
+"""Websocket API for Medtrum EasyView."""
+
+from __future__ import annotations
+
+import base64
+import heapq
+import itertools
+import logging
+import struct
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    SERIES_ENCODINGS,
+    SERIES_MAX_POINTS,
+    SERIES_VALUE_SCALE,
+    SIGNAL_NEW_READINGS,
+    ReadingType,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from .coordinator import MedtrumEasyViewDataUpdateCoordinator
+    from .history import Reading, ReadingLog
+
+_LOGGER = logging.getLogger(__name__)
+
+READING_TYPES = [reading_type.name.lower() for reading_type in ReadingType]
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the Medtrum EasyView websocket commands."""
+    websocket_api.async_register_command(hass, ws_series)
+    websocket_api.async_register_command(hass, ws_subscribe_series)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/series",
+        vol.Required("config_entry_id"): str,
+        vol.Required("reading_type"): vol.In(READING_TYPES),
+        vol.Required("start_time"): str,
+        vol.Optional("end_time"): str,
+        vol.Optional("encoding", default=SERIES_ENCODINGS[0]): vol.In(SERIES_ENCODINGS),
+        vol.Optional("limit", default=SERIES_MAX_POINTS): vol.All(
+            int, vol.Range(min=1, max=SERIES_MAX_POINTS)
+        ),
+    }
+)
+@websocket_api.async_response
+async def ws_series(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the columnar series of a reading type for a time range."""
+    coordinator = _get_coordinator(hass, connection, msg)
+    if coordinator is None:
+        return
+
+    start = dt_util.parse_datetime(msg["start_time"])
+    end = dt_util.parse_datetime(msg["end_time"]) if "end_time" in msg else None
+    if start is None or ("end_time" in msg and end is None):
+        connection.send_error(msg["id"], "invalid_format", "Invalid time range")
+        return
+
+    readings = await hass.async_add_executor_job(
+        _read_series,
+        coordinator.reading_log,
+        int(dt_util.as_utc(start).timestamp()),
+        int(dt_util.as_utc(end or dt_util.utcnow()).timestamp()),
+        ReadingType[msg["reading_type"].upper()],
+        msg["limit"],
+    )
+    connection.send_result(
+        msg["id"],
+        {
+            **encode_series(readings[: msg["limit"]], msg["encoding"]),
+            "truncated": len(readings) > msg["limit"],
+        },
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/series/subscribe",
+        vol.Required("config_entry_id"): str,
+        vol.Required("reading_type"): vol.In(READING_TYPES),
+        vol.Optional("encoding", default=SERIES_ENCODINGS[0]): vol.In(SERIES_ENCODINGS),
+    }
+)
+@callback
+def ws_subscribe_series(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Push the points appended to a series as they are received."""
+    coordinator = _get_coordinator(hass, connection, msg)
+    if coordinator is None:
+        return
+    reading_type = ReadingType[msg["reading_type"].upper()]
+
+    @callback
+    def forward_readings(readings: list[Reading]) -> None:
+        """Send the new points of the subscribed series."""
+        points = sorted(reading for reading in readings if reading.type == reading_type)
+        if points:
+            connection.send_message(
+                websocket_api.event_message(
+                    msg["id"], encode_series(points, msg["encoding"])
+                )
+            )
+
+    connection.subscriptions[msg["id"]] = async_dispatcher_connect(
+        hass,
+        SIGNAL_NEW_READINGS.format(coordinator.config_entry.entry_id),
+        forward_readings,
+    )
+    connection.send_result(msg["id"])
+
+
+def encode_series(readings: Iterable[Reading], encoding: str) -> dict[str, Any]:
+    """
+    Encode readings as timestamp and value columns.
+
+    - delta: integer columns holding the first value then the differences,
+      values are multiplied by `scale` and rounded.
+    - base64: little-endian packed uint32 timestamps and float64 values.
+    """
+    timestamps = [reading.timestamp for reading in readings]
+    values = [reading.value for reading in readings]
+
+    if encoding == "base64":
+        return {
+            "encoding": encoding,
+            "count": len(timestamps),
+            "time": base64.b64encode(
+                struct.pack(f"<{len(timestamps)}I", *timestamps)
+            ).decode(),
+            "value": base64.b64encode(
+                struct.pack(f"<{len(values)}d", *values)
+            ).decode(),
+        }
+
+    scaled = [round(value * SERIES_VALUE_SCALE) for value in values]
+    return {
+        "encoding": encoding,
+        "count": len(timestamps),
+        "scale": SERIES_VALUE_SCALE,
+        "time": _delta(timestamps),
+        "value": _delta(scaled),
+    }
+
+
+def _delta(column: list[int]) -> list[int]:
+    """Return the first item of a column followed by the differences."""
+    return column[:1] + [
+        current - previous for previous, current in itertools.pairwise(column)
+    ]
+
+
+def _read_series(
+    reading_log: ReadingLog,
+    start: int,
+    end: int,
+    reading_type: ReadingType,
+    limit: int,
+) -> list[Reading]:
+    """Read the first `limit` + 1 points of a series, run in the executor."""
+    return heapq.nsmallest(limit + 1, reading_log.query(start, end, {reading_type}))
+
+
+def _get_coordinator(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> MedtrumEasyViewDataUpdateCoordinator | None:
+    """Return the coordinator of the requested entry, send an error if none."""
+    coordinator = hass.data.get(DOMAIN, {}).get(msg["config_entry_id"])
+    if coordinator is None:
+        connection.send_error(
+            msg["id"],
+            websocket_api.ERR_NOT_FOUND,
+            f"No loaded Medtrum EasyView entry with id {msg['config_entry_id']}",
+        )
+    return coordinator
@@ -0,0 +1,25 @@
+# Imported by the scripts next to it, this directory is not a package.
+# ruff: noqa: INP001
+"""Import the Medtrum EasyView modules that do not depend on Home Assistant."""
+
+import importlib.machinery
+import importlib.util
+import sys
+from pathlib import Path
+
+PACKAGE = "medtrum_easyview"
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "custom_components" / PACKAGE
+
+
+def register() -> None:
+    """
+    Register the package without running its __init__.
+
+    The package __init__ sets up the Home Assistant integration, the scripts
+    only need modules that do not depend on Home Assistant. Processes spawned
+    by a script run it again, which registers the package in them too.
+    """
+    if PACKAGE not in sys.modules:
+        spec = importlib.machinery.ModuleSpec(PACKAGE, None, is_package=True)
+        spec.submodule_search_locations = [str(PACKAGE_DIR)]
+        sys.modules[PACKAGE] = importlib.util.module_from_spec(spec)